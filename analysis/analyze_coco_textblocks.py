@@ -1,11 +1,115 @@
+import cProfile
 import json
+import mmap
 import os
+import re
 import numpy as np
 import argparse
-from collections import defaultdict
+import pstats
+import zipfile
+from array import array
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+# ijson parses the annotation file incrementally, so we never hold the whole document in memory.
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+    IJSON_ERRORS = (ijson.JSONError,)
+except ImportError:
+    IJSON_AVAILABLE = False
+    IJSON_ERRORS = ()
+
+# orjson parses several times faster than the json module when the whole file has to be loaded.
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# pyinstrument writes an interactive flame graph for --profile; cProfile is used without it.
+try:
+    from pyinstrument import Profiler
+    PYINSTRUMENT_AVAILABLE = True
+except ImportError:
+    PYINSTRUMENT_AVAILABLE = False
 
 INTEREST_CLASSES = ["author", "title", "subtitle"]
 TEXT_ORIENTATIONS = ["text-upright", "text-upside-down", "text-rotated-left", "text-rotated-right"]
+STAT_KEYS = ["rel_x", "rel_y", "rel_w", "rel_h", "rel_y_center"]
+
+# Annotation file names: *.json containing "annotation" or "coco" (case-insensitive)
+COCO_FILE_PATTERN = re.compile(r"(?i:annotation|coco).*\.json$")
+
+# Suffix of the cache file stored next to each annotation file
+STATS_CACHE_SUFFIX = ".stats.npz"
+
+# Resolution of the histogram used for the median of aggregated statistics
+HISTOGRAM_BINS = 10000
+
+# Output files of --profile (pyinstrument / cProfile)
+PROFILE_HTML = "profile.html"
+PROFILE_STATS = "profile.prof"
+
+class RunningStats:
+    """
+    Streaming summary of a series of relative values (0..1).
+    
+    Keeps count, sum, sum of squares, min and max, plus a fixed-resolution histogram for an
+    approximate median, so values can be added and merged without keeping them in memory.
+    """
+    
+    def __init__(self):
+        self.n = 0
+        self.s = 0.0
+        self.s2 = 0.0
+        self.mn = np.inf
+        self.mx = -np.inf
+        self.hist = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+    
+    def __len__(self):
+        return self.n
+    
+    def add(self, arr):
+        """
+        Adds all values of an array.
+        """
+        if arr.size == 0:
+            return
+        self.n += arr.size
+        # Sums in float64, so summary() doesn't lose the std to float32 cancellation
+        arr64 = arr.astype(np.float64)
+        self.s += float(arr64.sum())
+        self.s2 += float(arr64 @ arr64)
+        self.mn = min(self.mn, float(arr.min()))
+        self.mx = max(self.mx, float(arr.max()))
+        # Values outside 0..1 (boxes reaching over the image border) go into the outermost bins
+        bins = np.clip((arr * HISTOGRAM_BINS).astype(np.int64), 0, HISTOGRAM_BINS - 1)
+        self.hist += np.bincount(bins, minlength=HISTOGRAM_BINS)
+    
+    def merge(self, other):
+        """
+        Adds the values summarized by another RunningStats.
+        """
+        self.n += other.n
+        self.s += other.s
+        self.s2 += other.s2
+        self.mn = min(self.mn, other.mn)
+        self.mx = max(self.mx, other.mx)
+        self.hist += other.hist
+    
+    def summary(self):
+        """
+        Returns (mean, median, min, max, std); the median is accurate to 1 / HISTOGRAM_BINS.
+        """
+        mean = self.s / self.n
+        std = np.sqrt(max(self.s2 / self.n - mean * mean, 0.0))
+        # Bins of the two middle values (the same one for odd counts), averaged like np.median does
+        middle_bins = np.searchsorted(np.cumsum(self.hist), [(self.n + 1) // 2, self.n // 2 + 1])
+        median = (float(middle_bins.mean()) + 0.5) / HISTOGRAM_BINS
+        median = min(max(median, self.mn), self.mx)
+        return mean, median, self.mn, self.mx, std
 
 def find_coco_annotations(base_path):
     """
@@ -23,22 +127,235 @@ def find_coco_annotations(base_path):
         return coco_files
     
     # Search all subdirectories
-    for root, dirs, files in os.walk(base_path):
-        for file in files:
-            # Look for various possible annotation file names
-            if file.endswith('.json') and ('annotation' in file.lower() or 'coco' in file.lower()):
-                full_path = os.path.join(root, file)
-                coco_files.append(full_path)
-                print(f"Found: {full_path}")
+    for full_path in _scan_coco_annotations(base_path):
+        coco_files.append(full_path)
+        print(f"Found: {full_path}")
     
     return sorted(coco_files)
 
-def analyze_coco_file(coco_path):
+def _scan_coco_annotations(path):
+    """
+    Recursively yields the paths of all files below a directory that look like COCO annotation files.
+    
+    os.scandir returns the file type along with each entry, so no extra stat() call is
+    needed per file.
+    """
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan_coco_annotations(entry.path)
+            elif entry.is_file() and COCO_FILE_PATTERN.search(entry.name):
+                yield entry.path
+
+def _empty_stats():
+    """
+    Creates the (empty) statistics structure: class -> orientation -> key -> values.
+    """
+    stats = {}
+    for cls in INTEREST_CLASSES:
+        stats[cls] = {}
+        for orientation in TEXT_ORIENTATIONS + ["unknown"]:
+            stats[cls][orientation] = {key: np.empty(0, dtype=np.float32) for key in STAT_KEYS}
+    return stats
+
+@dataclass(slots=True)
+class ClassAnnotations:
+    """
+    Raw values of the annotations of one class, in contiguous typed buffers.
+    """
+    img_ids: array = field(default_factory=lambda: array("q"))
+    # Flattened (x, y, w, h) per annotation
+    bboxes: array = field(default_factory=lambda: array("f"))
+
+def _image_rows(img_ids, ann_img_ids):
+    """
+    Maps the image ids of annotations to rows of the image tables.
+    
+    Dense ids (the usual case, e.g. 0..N-1) are looked up in a direct index table, sparse ids
+    with a binary search over the sorted ids.
+    
+    Args:
+        img_ids (numpy.ndarray): Image ids, one per row of the image tables
+        ann_img_ids (numpy.ndarray): Image ids of the annotations
+    
+    Returns:
+        numpy.ndarray: Row per annotation, -1 for ids without an image entry
+    """
+    rows = np.full(ann_img_ids.size, -1, dtype=np.int64)
+    if img_ids.size == 0:
+        return rows
+    
+    if img_ids.min() >= 0 and img_ids.max() < 2 * img_ids.size + 1024:
+        table = np.full(img_ids.max() + 1, -1, dtype=np.int64)
+        table[img_ids] = np.arange(img_ids.size)
+        in_range = (ann_img_ids >= 0) & (ann_img_ids < table.size)
+        rows[in_range] = table[ann_img_ids[in_range]]
+    else:
+        order = np.argsort(img_ids)
+        sorted_ids = img_ids[order]
+        pos = np.minimum(np.searchsorted(sorted_ids, ann_img_ids), sorted_ids.size - 1)
+        found = sorted_ids[pos] == ann_img_ids
+        rows[found] = order[pos[found]]
+    return rows
+
+def _clip_bboxes(bboxes, img_w, img_h):
+    """
+    Clips bounding boxes to the image bounds and drops boxes that lie completely outside.
+    
+    Args:
+        bboxes (numpy.ndarray): (N, 4) array of (x, y, w, h)
+        img_w (numpy.ndarray): Image width per box
+        img_h (numpy.ndarray): Image height per box
+    
+    Returns:
+        tuple: (clipped bboxes, mask of the boxes that were kept)
+    """
+    x, y, w, h = bboxes.T
+    x1 = np.maximum(x, 0)
+    y1 = np.maximum(y, 0)
+    x2 = np.minimum(x + w, img_w)
+    y2 = np.minimum(y + h, img_h)
+    clipped = np.stack([x1, y1, np.maximum(x2 - x1, 0), np.maximum(y2 - y1, 0)], axis=1)
+    keep = (clipped[:, 2] > 0) & (clipped[:, 3] > 0)
+    return clipped[keep], keep
+
+def _compute_relative_stats(images, annotations, clip=False):
+    """
+    Computes the relative bounding box values from the raw annotation values.
+    
+    Image sizes and orientations are gathered from the image tables and all divisions are
+    done vectorized on one array per class and orientation instead of per annotation in Python.
+    
+    Args:
+        images (dict): Image tables "id", "width", "height" and "orientation" (index into
+            TEXT_ORIENTATIONS + ["unknown"]), one row per image
+        annotations (dict): class -> ClassAnnotations
+        clip (bool): Whether to clip the bounding boxes to the image bounds first
+    
+    Returns:
+        dict: Statistics for each class and orientation, as float32 arrays per key
+    """
+    stats = _empty_stats()
+    for cls in INTEREST_CLASSES:
+        raw = annotations[cls]
+        if not raw.img_ids:
+            continue
+        
+        rows = _image_rows(images["id"], np.frombuffer(raw.img_ids, dtype=np.int64))
+        known = rows >= 0
+        if not known.all():
+            print(f"Warning: Skipping {int((~known).sum())} '{cls}' annotations without image entry")
+        rows = rows[known]
+        bboxes = np.frombuffer(raw.bboxes, dtype=np.float32).reshape(-1, 4)[known]
+        img_w = images["width"][rows]
+        img_h = images["height"][rows]
+        if clip:
+            bboxes, keep = _clip_bboxes(bboxes, img_w, img_h)
+            rows, img_w, img_h = rows[keep], img_w[keep], img_h[keep]
+        ann_orientations = images["orientation"][rows]
+        
+        for i, orientation in enumerate(TEXT_ORIENTATIONS + ["unknown"]):
+            mask = ann_orientations == i
+            if not mask.any():
+                continue
+            x, y, w, h = bboxes[mask].T
+            stats[cls][orientation] = {
+                "rel_x": x / img_w[mask],
+                "rel_y": y / img_h[mask],
+                "rel_w": w / img_w[mask],
+                "rel_h": h / img_h[mask],
+                "rel_y_center": (y + h * 0.5) / img_h[mask],
+            }
+    return stats
+
+def _load_coco_document(f):
+    """
+    Loads a complete COCO annotation file, using orjson if available.
+    
+    With orjson, the file is memory-mapped and parsed straight from the page cache instead of
+    being copied into a bytes object first.
+    
+    Args:
+        f: COCO annotation file, opened in binary mode
+    
+    Returns:
+        dict: The parsed document
+    """
+    if ORJSON_AVAILABLE:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # The file is read front to back exactly once
+            if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+    return json.load(f)
+
+def _iter_coco_items(f, data, sections):
+    """
+    Iterates over the items of several top-level arrays in a COCO annotation file.
+    
+    With ijson, the file is tokenized once and the items of all requested arrays are built one
+    by one as their events come by, in file order; only a single item is held in memory at any
+    time. Without it, the items are taken from the already loaded document, array by array.
+    
+    Args:
+        f: COCO annotation file, opened in binary mode
+        data (dict): Fully loaded document, or None when streaming with ijson
+        sections (tuple): Names of the top-level arrays, e.g. ("categories", "annotations")
+    
+    Returns:
+        iterator: (section, item) pairs
+    """
+    if data is not None:
+        for section in sections:
+            for item in data.get(section, []):
+                yield section, item
+        return
+    
+    item_prefixes = {f"{section}.item": section for section in sections}
+    # use_float avoids Decimal objects for the bbox coordinates
+    events = ijson.parse(f, use_float=True)
+    for prefix, event, value in events:
+        section = item_prefixes.get(prefix)
+        if section is None:
+            continue
+        if event not in ("start_map", "start_array"):
+            yield section, value
+            continue
+        
+        # Build the item from its events, up to the matching end event
+        builder = ijson.ObjectBuilder()
+        builder.event(event, value)
+        depth = 1
+        for _, event, value in events:
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+                if depth == 0:
+                    break
+        yield section, builder.value
+
+def _get_orientation(img):
+    """
+    Returns the text orientation tag of a COCO image entry, or "unknown".
+    """
+    # Check both direct tags and extra.user_tags
+    tags = img.get("tags", [])
+    extra_tags = img.get("extra", {}).get("user_tags", [])
+    for tag in tags + extra_tags:
+        if tag in TEXT_ORIENTATIONS:
+            return tag
+    return "unknown"
+
+def analyze_coco_file(coco_path, clip=False):
     """
     Analyzes a COCO annotation file and collects statistics by text orientation.
     
     Args:
         coco_path (str): Path to the COCO annotation file
+        clip (bool): Whether to clip bounding boxes to the image bounds
     
     Returns:
         dict: Statistics for each class and orientation
@@ -48,80 +365,184 @@ def analyze_coco_file(coco_path):
     if not os.path.exists(coco_path):
         print(f"Warning: File {coco_path} does not exist!")
         # Return empty stats structure
-        empty_stats = {}
-        for cls in INTEREST_CLASSES:
-            empty_stats[cls] = {}
-            for orientation in TEXT_ORIENTATIONS + ["unknown"]:
-                empty_stats[cls][orientation] = defaultdict(list)
-        return empty_stats
+        return _empty_stats()
+    
+    # Collect raw values per class in contiguous typed buffers (no Python object per value);
+    # image sizes and orientations are looked up afterwards
+    annotations = {cls: ClassAnnotations() for cls in INTEREST_CLASSES}
+    orientation_index = {orientation: i for i, orientation in enumerate(TEXT_ORIENTATIONS + ["unknown"])}
     
     try:
-        with open(coco_path, "r") as f:
-            data = json.load(f)
-    except (json.JSONDecodeError, IOError) as e:
+        with open(coco_path, "rb") as f:
+            # Without ijson, fall back to loading the whole document at once
+            data = None if IJSON_AVAILABLE else _load_coco_document(f)
+            
+            # Mapping category_id -> buffers of the class, only for the classes of interest, so that
+            # all other annotations are skipped by a single int lookup
+            interest_cat_id_to_annotations = {}
+            categories_seen = False
+            # Annotations listed before the categories, per category_id, until the classes are known
+            early_annotations = {}
+            
+            # Image tables: id, width, height and text orientation, one row per image
+            img_ids, img_widths, img_heights, img_orientations = [], [], [], []
+            
+            # A single pass over the file; the arrays are handled in whatever order they appear
+            for section, item in _iter_coco_items(f, data, ("categories", "images", "annotations")):
+                if section == "annotations":
+                    if categories_seen:
+                        raw = interest_cat_id_to_annotations.get(item["category_id"])
+                        if raw is None:
+                            continue
+                    else:
+                        raw = early_annotations.setdefault(item["category_id"], ClassAnnotations())
+                    
+                    # relative values are computed afterwards for all annotations at once
+                    x, y, w, h = item["bbox"]
+                    raw.img_ids.append(item["image_id"])
+                    raw.bboxes.extend((x, y, w, h))
+                elif section == "images":
+                    img_ids.append(item["id"])
+                    img_widths.append(item["width"])
+                    img_heights.append(item["height"])
+                    img_orientations.append(orientation_index[_get_orientation(item)])
+                else:
+                    categories_seen = True
+                    if item["name"] in INTEREST_CLASSES:
+                        interest_cat_id_to_annotations[item["id"]] = annotations[item["name"]]
+            
+            for cat_id, early in early_annotations.items():
+                raw = interest_cat_id_to_annotations.get(cat_id)
+                if raw is not None:
+                    raw.img_ids.extend(early.img_ids)
+                    raw.bboxes.extend(early.bboxes)
+            
+            images = {
+                "id": np.asarray(img_ids, dtype=np.int64),
+                "width": np.asarray(img_widths, dtype=np.float32),
+                "height": np.asarray(img_heights, dtype=np.float32),
+                "orientation": np.asarray(img_orientations, dtype=np.int8),
+            }
+    except (json.JSONDecodeError, IOError, ValueError, TypeError, *IJSON_ERRORS) as e:
+        # orjson reports malformed input via a ValueError subclass,
+        # non-integer image ids or non-numeric bboxes raise a TypeError in the typed buffers
         print(f"Error loading {coco_path}: {e}")
         # Return empty stats structure
-        empty_stats = {}
-        for cls in INTEREST_CLASSES:
-            empty_stats[cls] = {}
-            for orientation in TEXT_ORIENTATIONS + ["unknown"]:
-                empty_stats[cls][orientation] = defaultdict(list)
-        return empty_stats
+        return _empty_stats()
+    
+    return _compute_relative_stats(images, annotations, clip)
+
+def _summary_stats(arr):
+    """
+    Computes mean, median, min, max and standard deviation of an array.
     
-    # Mapping category_id -> name
-    cat_id_to_name = {cat["id"]: cat["name"] for cat in data["categories"]}
-    # Mapping name -> category_id
-    name_to_cat_id = {v: k for k, v in cat_id_to_name.items()}
+    Min, median and max come from a single np.quantile call (partition based, no full sort),
+    the standard deviation is derived from the sum of squares instead of another pass around
+    the mean.
     
-    # Mapping image_id -> (width, height)
-    img_id_to_shape = {img["id"]: (img["width"], img["height"]) for img in data["images"]}
+    Args:
+        arr (numpy.ndarray or RunningStats): 1-D array of values, must not be empty
     
-    # Mapping image_id -> tags (for text orientation)
-    img_id_to_tags = {}
+    Returns:
+        tuple: (mean, median, min, max, std)
+    """
+    if isinstance(arr, RunningStats):
+        return arr.summary()
     
-    for img in data["images"]:
-        # Check both direct tags and extra.user_tags
-        tags = img.get("tags", [])
-        extra_tags = img.get("extra", {}).get("user_tags", [])
-        all_tags_combined = tags + extra_tags
-        
-        orientation = "unknown"
-        for tag in all_tags_combined:
-            if tag in TEXT_ORIENTATIONS:
-                orientation = tag
-                break
-        img_id_to_tags[img["id"]] = orientation
+    min_val, median, max_val = np.quantile(arr, [0.0, 0.5, 1.0])
+    n = arr.size
+    # Accumulate in float64: in float32, E[x²] - mean² cancels for values with a small spread
+    arr64 = arr.astype(np.float64)
+    mean = float(arr64.sum()) / n
+    variance = float(arr64 @ arr64) / n - mean * mean
+    std = np.sqrt(max(variance, 0.0))
+    return mean, median, min_val, max_val, std
+
+def _file_fingerprint(path, clip=False):
+    """
+    Returns a fingerprint of a file that changes whenever the file is modified.
     
+    The clip option is part of the fingerprint, since it changes the cached values.
+    """
+    st = os.stat(path)
+    return np.array([st.st_mtime_ns, st.st_size, int(clip)], dtype=np.int64)
+
+def _load_cached_stats(cache_path, fingerprint):
+    """
+    Loads statistics from a cache file, if it matches the given fingerprint.
     
-    # Collect values per class and orientation
-    stats = {}
+    Args:
+        cache_path (str): Path to the .stats.npz cache file
+        fingerprint (numpy.ndarray): Fingerprint of the annotation file
+    
+    Returns:
+        dict: Statistics for each class and orientation, or None if there is no valid cache
+    """
+    if not os.path.exists(cache_path):
+        return None
+    
+    try:
+        with np.load(cache_path) as cached:
+            if not np.array_equal(cached["fingerprint"], fingerprint):
+                return None
+            stats = _empty_stats()
+            for cls in INTEREST_CLASSES:
+                for orientation in TEXT_ORIENTATIONS + ["unknown"]:
+                    for key in STAT_KEYS:
+                        stats[cls][orientation][key] = cached[f"{cls}__{orientation}__{key}"]
+            return stats
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        print(f"Warning: Ignoring unreadable cache {cache_path}: {e}")
+        return None
+
+def _save_cached_stats(cache_path, fingerprint, stats):
+    """
+    Saves statistics to a cache file, flattening them to one array per class, orientation and key.
+    """
+    flat_stats = {}
     for cls in INTEREST_CLASSES:
-        stats[cls] = {}
         for orientation in TEXT_ORIENTATIONS + ["unknown"]:
-            stats[cls][orientation] = defaultdict(list)
+            for key in STAT_KEYS:
+                flat_stats[f"{cls}__{orientation}__{key}"] = stats[cls][orientation][key]
     
-    for ann in data["annotations"]:
-        cat = cat_id_to_name.get(ann["category_id"])
-        if cat not in INTEREST_CLASSES:
-            continue
-        
-        img_id = ann["image_id"]
-        img_w, img_h = img_id_to_shape[img_id]
-        orientation = img_id_to_tags.get(img_id, "unknown")
-        
-        x, y, w, h = ann["bbox"]
-        # relative values
-        rel_x = x / img_w
-        rel_y = y / img_h
-        rel_w = w / img_w
-        rel_h = h / img_h
-        rel_y_center = (y + h/2) / img_h
-        
-        stats[cat][orientation]["rel_x"].append(rel_x)
-        stats[cat][orientation]["rel_y"].append(rel_y)
-        stats[cat][orientation]["rel_w"].append(rel_w)
-        stats[cat][orientation]["rel_h"].append(rel_h)
-        stats[cat][orientation]["rel_y_center"].append(rel_y_center)
+    # Write to a temporary file first, so an interrupted run never leaves a broken cache behind
+    tmp_path = cache_path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, fingerprint=fingerprint, **flat_stats)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: Could not write cache {cache_path}: {e}")
+
+def analyze_coco_file_cached(coco_path, use_cache=True, clip=False):
+    """
+    Analyzes a COCO annotation file, reusing the results of a previous analysis if the file
+    has not changed since.
+    
+    The results are cached in a .stats.npz file next to the annotation file, together with
+    the modification time and size of the annotation file.
+    
+    Args:
+        coco_path (str): Path to the COCO annotation file
+        use_cache (bool): Whether to read and write the cache file
+        clip (bool): Whether to clip bounding boxes to the image bounds
+    
+    Returns:
+        dict: Statistics for each class and orientation
+    """
+    if not use_cache or not os.path.exists(coco_path):
+        return analyze_coco_file(coco_path, clip)
+    
+    cache_path = coco_path + STATS_CACHE_SUFFIX
+    fingerprint = _file_fingerprint(coco_path, clip)
+    
+    stats = _load_cached_stats(cache_path, fingerprint)
+    if stats is not None:
+        print(f"Using cached statistics: {cache_path}")
+        return stats
+    
+    stats = analyze_coco_file(coco_path, clip)
+    _save_cached_stats(cache_path, fingerprint, stats)
     return stats
 
 def print_stats(stats, split_name):
@@ -133,7 +554,7 @@ def print_stats(stats, split_name):
         for orientation in TEXT_ORIENTATIONS + ["unknown"]:
             # Check if there's any data for this orientation
             has_data = False
-            for key in ["rel_x", "rel_y", "rel_w", "rel_h", "rel_y_center"]:
+            for key in STAT_KEYS:
                 if len(stats[cls][orientation][key]) > 0:
                     has_data = True
                     break
@@ -142,26 +563,106 @@ def print_stats(stats, split_name):
                 continue
                 
             print(f"\n  Orientation: {orientation}")
-            for key in ["rel_x", "rel_y", "rel_w", "rel_h", "rel_y_center"]:
-                arr = np.array(stats[cls][orientation][key])
+            for key in STAT_KEYS:
+                arr = stats[cls][orientation][key]
                 if len(arr) == 0:
                     continue
-                print(f"    {key}: Mean={arr.mean():.3f}, Median={np.median(arr):.3f}, Min={arr.min():.3f}, Max={arr.max():.3f}, Std={arr.std():.3f}, N={len(arr)}")
+                mean, median, min_val, max_val, std = _summary_stats(arr)
+                print(f"    {key}: Mean={mean:.3f}, Median={median:.3f}, Min={min_val:.3f}, Max={max_val:.3f}, Std={std:.3f}, N={len(arr)}")
 
-def merge_stats(stats_list):
-    merged = {}
-    for cls in INTEREST_CLASSES:
-        merged[cls] = {}
-        for orientation in TEXT_ORIENTATIONS + ["unknown"]:
-            merged[cls][orientation] = defaultdict(list)
+def merge_stats(stats_list, merged=None):
+    """
+    Merges statistics into running accumulators, without keeping the individual values.
+    
+    Args:
+        stats_list (list): Statistics to merge, with arrays or RunningStats per key
+        merged (dict): Accumulators of a previous call to add to, or None to start new ones
+    
+    Returns:
+        dict: RunningStats for each class, orientation and key
+    """
+    if merged is None:
+        merged = {
+            cls: {
+                orientation: {key: RunningStats() for key in STAT_KEYS}
+                for orientation in TEXT_ORIENTATIONS + ["unknown"]
+            }
+            for cls in INTEREST_CLASSES
+        }
     
     for stats in stats_list:
         for cls in INTEREST_CLASSES:
             for orientation in TEXT_ORIENTATIONS + ["unknown"]:
-                for key, values in stats[cls][orientation].items():
-                    merged[cls][orientation][key].extend(values)
+                for key in STAT_KEYS:
+                    values = stats[cls][orientation][key]
+                    if isinstance(values, RunningStats):
+                        merged[cls][orientation][key].merge(values)
+                    else:
+                        merged[cls][orientation][key].add(values)
     return merged
 
+def analyze_files(coco_files, analyze, jobs=None, in_process=False):
+    """
+    Analyzes annotation files in a process pool and yields the results as they arrive.
+    
+    Args:
+        coco_files (list): Paths to the COCO annotation files
+        analyze: Function analyzing a single file
+        jobs (int): Number of worker processes (default: number of CPUs)
+        in_process (bool): Analyze the files one after another in this process instead
+    
+    Yields:
+        tuple: (coco_path, statistics)
+    """
+    if in_process:
+        for coco_path in coco_files:
+            yield coco_path, analyze(coco_path)
+        return
+    
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(analyze, coco_path): coco_path for coco_path in coco_files}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def start_profiler():
+    """
+    Starts profiling with pyinstrument if available, otherwise with cProfile.
+    """
+    if PYINSTRUMENT_AVAILABLE:
+        profiler = Profiler()
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return profiler
+
+def stop_profiler(profiler):
+    """
+    Stops profiling and writes the results: a flame graph (pyinstrument) or a .prof file
+    plus the top functions by cumulative time (cProfile).
+    """
+    if PYINSTRUMENT_AVAILABLE:
+        profiler.stop()
+        profiler.write_html(PROFILE_HTML)
+        print(f"\nProfile written to {PROFILE_HTML}")
+    else:
+        profiler.disable()
+        profiler.dump_stats(PROFILE_STATS)
+        print(f"\nProfile written to {PROFILE_STATS} (install pyinstrument for a flame graph)")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+
+def get_display_name(coco_path, dataset_path):
+    """
+    Returns the name of an annotation file relative to the dataset directory, for display.
+    """
+    relative_path = os.path.relpath(coco_path, dataset_path)
+    directory_name = os.path.dirname(relative_path)
+    filename = os.path.basename(coco_path)
+    
+    if directory_name:
+        return f"{directory_name}/{filename}"
+    return filename
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Analyze COCO annotations for text blocks on book spines")
     parser.add_argument(
@@ -169,6 +670,27 @@ if __name__ == "__main__":
         type=str, 
         help="Path to the dataset directory"
     )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=None,
+        help="Number of annotation files analyzed in parallel (default: number of CPUs)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Always re-analyze the annotation files instead of using the {STATS_CACHE_SUFFIX} cache files"
+    )
+    parser.add_argument(
+        "--clip",
+        action="store_true",
+        help="Clip bounding boxes to the image bounds and ignore boxes completely outside the image"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"Profile the analysis (in a single process) and write {PROFILE_HTML} or {PROFILE_STATS}"
+    )
     
     args = parser.parse_args()
     
@@ -183,26 +705,23 @@ if __name__ == "__main__":
     for file in coco_files:
         print(f"  - {file}")
     
-    # Analyze all found files
-    all_stats = []
-    for coco_path in coco_files:
-        stats = analyze_coco_file(coco_path)
-        all_stats.append(stats)
+    # When profiling, everything runs in this process, as the profiler does not see the workers
+    profiler = start_profiler() if args.profile else None
+    
+    # Analyze all found files in parallel, showing the results as they arrive.
+    # Each result is folded into the running totals right away instead of being kept around.
+    merged_stats = None
+    analyze = partial(analyze_coco_file_cached, use_cache=not args.no_cache, clip=args.clip)
+    for coco_path, stats in analyze_files(coco_files, analyze, args.jobs, in_process=args.profile):
+        merged_stats = merge_stats([stats], merged_stats)
         
         # Show statistics for each file individually with full context
-        relative_path = os.path.relpath(coco_path, args.dataset_path)
-        directory_name = os.path.dirname(relative_path)
-        filename = os.path.basename(coco_path)
-        
-        if directory_name:
-            display_name = f"{directory_name}/{filename}"
-        else:
-            display_name = filename
-            
-        print_stats(stats, display_name)
+        print_stats(stats, get_display_name(coco_path, args.dataset_path))
     
     # Show aggregated statistics
-    if len(all_stats) > 1:
-        merged_stats = merge_stats(all_stats)
+    if len(coco_files) > 1:
         print("\n" + "="*60)
         print_stats(merged_stats, "ALL FILES AGGREGATED")
+    
+    if profiler is not None:
+        stop_profiler(profiler)
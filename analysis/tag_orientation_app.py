@@ -1,109 +1,174 @@
 import os
 import json
 import cv2
+import numpy as np
+import tkinter as tk
 from PIL import Image, ImageTk
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 import argparse
+import logging
+import random
 import time
 import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+# orjson decodes the API responses several times faster than the json module
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # ==== Configuration ====
 
+# Debug output goes through this logger; its level is set from --debug
+logger = logging.getLogger(__name__)
+
 # Roboflow API access
 load_dotenv()
 API_KEY = os.getenv("API_KEY")
 WORKSPACE = os.getenv("WORKSPACE")
 PROJECT = os.getenv("PROJECT")
 
+# Roboflow API endpoints of the project
+BASE_URL = f"https://api.roboflow.com/{WORKSPACE}/{PROJECT}"
+IMAGES_URL = BASE_URL + "/images"
+IMAGE_URL_TMPL = IMAGES_URL + "/{image_id}"
+TAGS_URL_TMPL = IMAGES_URL + "/{image_id}/tags"
+SEARCH_URL = BASE_URL + "/search"
+
+# Shared session for all Roboflow API calls, so connections (and TLS sessions) are reused.
+# Safe to use from the download threads. Retries are left to api_request_with_retry.
+SESSION = requests.Session()
+SESSION.headers.update({"Authorization": f"Bearer {API_KEY}"})
+SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0))
+
+# Number of upcoming images downloaded in the background while the current one is shown
+PREFETCH_COUNT = 4
+
+# Number of parallel image details requests used to look up the download URLs
+URL_LOOKUP_WORKERS = 8
+
+# Number of upcoming images whose download URLs are looked up ahead of the current one
+# (at least PREFETCH_COUNT, so the background downloads find their URLs resolved)
+URL_LOOKUP_DEPTH = 2 * PREFETCH_COUNT
+
+# Number of downloaded images kept in memory, so going back does not download them again
+IMAGE_CACHE_SIZE = 32
+
+# Image search: page size, parallel page requests, and pages requested at once when the
+# total number of images is unknown
+SEARCH_PAGE_SIZE = 100
+SEARCH_WORKERS = 8
+SEARCH_SPECULATIVE_PAGES = 3
+
+# Local record of the images tagged with this app, and how often it is written during tagging
+TAG_CACHE_PATH = os.path.expanduser("~/.bookfinder_tag_cache.json")
+TAG_CACHE_FLUSH_INTERVAL = 10
+
+# Size of the image area in the app window
+DISPLAY_WIDTH = 800
+DISPLAY_HEIGHT = 400
+
+# Interval (in ms) in which the UI checks whether the image to show has been downloaded
+DOWNLOAD_POLL_INTERVAL = 20
+
+# Key bindings for the tags
+TAG_KEYS = {
+    "w": "text-upright",
+    "s": "text-upside-down",
+    "a": "text-rotated-left",
+    "d": "text-rotated-right",
+}
+
 # ==== Retry mechanism ====
 
-def api_request_with_retry(request_func, max_retries=5, delay=1, debug=False):
+# HTTP status codes that are worth retrying; all other errors are permanent (e.g. 401, 404)
+RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+def retry_wait_time(attempt, delay, max_delay, response=None):
+    """
+    Returns the wait time before the next attempt: exponential backoff with jitter, or the
+    server's Retry-After (in seconds) when it sends one.
+    """
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(int(retry_after), max_delay)
+    return min(max_delay, delay * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+def api_request_with_retry(request_func, max_retries=5, delay=1, max_delay=30):
     """
     Executes an API request with retry mechanism.
     
+    Only network errors, timeouts, rate limiting (429) and server errors (5xx) are retried.
+    Other HTTP errors are returned to the caller right away, as is the last response when
+    a temporary HTTP error persists.
+    
     Args:
         request_func: Function that performs the HTTP request
         max_retries: Maximum number of retries
-        delay: Wait time between attempts (in seconds)
-        debug: Debug mode
+        delay: Base wait time between attempts (in seconds), doubled with each attempt
+        max_delay: Maximum wait time between attempts (in seconds)
         
     Returns:
         requests.Response object
         
     Raises:
-        SystemExit: When all retry attempts fail
+        requests.RequestException: When the last attempt fails with a network error
     """
-    last_exception = None
-    
     for attempt in range(max_retries + 1):
+        if attempt > 0:
+            logger.debug("Retry attempt %d/%d", attempt, max_retries)
+        
         try:
-            if debug and attempt > 0:
-                print(f"Debug: Retry attempt {attempt}/{max_retries}")
-            
             response = request_func()
-            
-            # Check for HTTP errors (4xx, 5xx)
-            if response.status_code >= 400:
-                if debug:
-                    print(f"Debug: HTTP error {response.status_code}, attempt {attempt + 1}/{max_retries + 1}")
-                if attempt < max_retries:
-                    time.sleep(delay * (attempt + 1))  # Exponential backoff
-                    continue
-                else:
-                    print(f"API request failed after {max_retries + 1} attempts. HTTP {response.status_code}: {response.text}")
-                    print("Stopping application due to persistent network issues.")
-                    sys.exit(1)
-            
-            return response
-            
-        except (requests.exceptions.RequestException, requests.exceptions.ConnectionError, 
-                requests.exceptions.Timeout, requests.exceptions.HTTPError) as e:
-            last_exception = e
-            if debug:
-                print(f"Debug: Network error on attempt {attempt + 1}/{max_retries + 1}: {e}")
-            
-            if attempt < max_retries:
-                time.sleep(delay * (attempt + 1))  # Exponential backoff
-            else:
-                print(f"Network request failed after {max_retries + 1} attempts. Last error: {e}")
-                print("Stopping application due to persistent network issues.")
-                sys.exit(1)
-        except Exception as e:
-            last_exception = e
-            if debug:
-                print(f"Debug: Unexpected error on attempt {attempt + 1}/{max_retries + 1}: {e}")
-            
-            if attempt < max_retries:
-                time.sleep(delay * (attempt + 1))
-            else:
-                print(f"Unexpected error after {max_retries + 1} attempts: {e}")
-                print("Stopping application due to persistent errors.")
-                sys.exit(1)
-    
-    # Should never be reached, but as fallback
-    print(f"Unexpected end of retry loop. Last error: {last_exception}")
-    sys.exit(1)
+        except requests.RequestException as e:
+            # Covers connection errors and timeouts
+            logger.debug("Network error on attempt %d/%d: %s", attempt + 1, max_retries + 1, e)
+            if attempt == max_retries:
+                raise
+            time.sleep(retry_wait_time(attempt, delay, max_delay))
+            continue
+        
+        # Check for temporary HTTP errors
+        if response.status_code in RETRY_STATUS_CODES and attempt < max_retries:
+            logger.debug("HTTP error %d on attempt %d/%d", response.status_code, attempt + 1, max_retries + 1)
+            time.sleep(retry_wait_time(attempt, delay, max_delay, response))
+            continue
+        
+        return response
 
 
 # ==== Support functions ====
-def remove_tag(image_id, tag, debug=False):
+
+def parse_json(response):
+    """
+    Decodes the JSON body of a response, using orjson if available.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(response.content)
+    return json.loads(response.content)
+
+# Runs the removal of a previous tag alongside the request adding the new one
+TAG_EXECUTOR = ThreadPoolExecutor(max_workers=1)
+
+def remove_tag(image_id, tag):
     
-    url_del = f"https://api.roboflow.com/{WORKSPACE}/{PROJECT}/images/{image_id}/tags"
-    headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"}
+    url_del = TAGS_URL_TMPL.format(image_id=image_id)
     data = {"operation": "remove", "tags": [tag]}
     
     try:
-        if debug:
-            print(f"Debug: REMOVE text-tag: {tag}")
-            print(f"Debug: URL: {url_del}")
-            print(f"Debug: Headers: {headers}")
-            print(f"Debug: Data: {data}")
+        logger.debug("REMOVE text-tag: %s, URL: %s, Data: %s", tag, url_del, data)
         
-        r = api_request_with_retry(lambda: requests.post(url_del, headers=headers, json=data), debug=debug)
+        r = api_request_with_retry(lambda: SESSION.post(url_del, json=data))
         
-        if debug:
-            print(f"Debug: REMOVE text-tag: {r.status_code} {r.text}")
+        if logger.isEnabledFor(logging.DEBUG):  # avoid decoding the body otherwise
+            logger.debug("REMOVE text-tag: %s %s", r.status_code, r.text)
         if r.status_code != 200:
             print(f"Error removing text-tag: {r.status_code} {r.text}")
         else:
@@ -114,28 +179,28 @@ def remove_tag(image_id, tag, debug=False):
         sys.exit(1)
 
 
-def set_tag(image_id, tag, debug=False, last_tagged=None):
+def set_tag(image_id, tag, last_tagged=None):
     
-    if last_tagged and image_id in last_tagged:
-        remove_tag(image_id, last_tagged[image_id], debug)
+    # Removing the previous tag and adding the new one are independent tag operations,
+    # so the remove request runs at the same time as the add request
+    remove_future = None
+    previous_tag = last_tagged.get(image_id) if last_tagged else None
+    if previous_tag and previous_tag != tag:
+        remove_future = TAG_EXECUTOR.submit(remove_tag, image_id, previous_tag)
         
-    url = f"https://api.roboflow.com/{WORKSPACE}/{PROJECT}/images/{image_id}/tags"
-    headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"}
+    url = TAGS_URL_TMPL.format(image_id=image_id)
     data = {"operation": "add", "tags": [tag]}
     
     try:
-        if debug:
-            print(f"Debug: URL: {url}")
-            print(f"Debug: Headers: {headers}")
-            print(f"Debug: Data: {data}")
+        logger.debug("URL: %s, Data: %s", url, data)
         
-        r = api_request_with_retry(lambda: requests.post(url, headers=headers, json=data), debug=debug)
+        r = api_request_with_retry(lambda: SESSION.post(url, json=data))
         
-        if debug:
-            print(f"Debug: Response status: {r.status_code}, Response body: {r.text}")
+        if logger.isEnabledFor(logging.DEBUG):  # avoid decoding the body otherwise
+            logger.debug("Response status: %s, Response body: %s", r.status_code, r.text)
         # Check for errors in the response body
         if r.status_code == 200:
-            response_json = r.json()
+            response_json = parse_json(r)
             if "error" in response_json:
                 print(f"Error in response: {response_json['error']}")
                 return False
@@ -144,6 +209,9 @@ def set_tag(image_id, tag, debug=False, last_tagged=None):
         print(f"Error tagging: {e}")
         print("Stopping application due to unexpected error.")
         sys.exit(1)
+    finally:
+        if remove_future is not None:
+            remove_future.result()
 
 
 def print_help():
@@ -167,132 +235,323 @@ def print_help():
       -h, --help     Show this help text
       -d, --debug    Enable debug mode (prints API requests and responses)
       -l, --limit    Max. number of images to tag (default: all available)
+      --no-cache     Ignore the local record of already tagged images (~/.bookfinder_tag_cache.json)
     """
     print(help_text)
 
-def get_images_without_text_tag(debug=False, limit=None):
+def fetch_search_page(offset):
     """
-    Fetches all images from the project that have NO tag with prefix 'text-'.
-    Supports pagination and applies the limit only after filtering.
+    Fetches one page of the image search, starting at offset.
+    Returns the parsed response.
     """
-    url = f"https://api.roboflow.com/{WORKSPACE}/{PROJECT}/search"
-    headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"}
+    url = SEARCH_URL
+    data = {
+        "fields": ["id", "name", "tags"],
+        "limit": SEARCH_PAGE_SIZE,
+        "offset": offset
+    }
     
-    all_filtered_images = []
-    offset = 0
-    page_size = 100
+    logger.debug("Fetching page at offset %d, URL: %s, Data: %s", offset, url, data)
+    
+    r = api_request_with_retry(lambda: SESSION.post(url, json=data))
     
+    logger.debug("Response status: %s, Response body length: %d", r.status_code, len(r.content))
+    
+    if r.status_code != 200:
+        print(f"Error fetching images: {r.status_code} {r.text}")
+        print("Stopping application due to API error.")
+        sys.exit(1)
+    
+    return parse_json(r)
+
+def iter_search_pages(executor):
+    """
+    Yields (offset, images) for all pages of the image search, in order.
+    
+    The first page is fetched alone. If the response tells the total number of images, all
+    remaining pages are fetched in parallel. Otherwise pages are fetched speculatively, a few
+    at a time, until a page with fewer than SEARCH_PAGE_SIZE images marks the end.
+    """
+    first_page = fetch_search_page(0)
+    images = first_page.get("results", [])
+    yield 0, images
+    if len(images) < SEARCH_PAGE_SIZE:
+        return
+    
+    total = first_page.get("total")
+    if isinstance(total, int):
+        logger.debug("%d images in total", total)
+        offsets = range(SEARCH_PAGE_SIZE, total, SEARCH_PAGE_SIZE)
+        for offset, page in zip(offsets, executor.map(fetch_search_page, offsets)):
+            yield offset, page.get("results", [])
+        return
+    
+    offset = SEARCH_PAGE_SIZE
     while True:
-        data = {
-            "fields": ["id", "name", "tags"],
-            "limit": page_size,
-            "offset": offset
-        }
-        
-        try:
-            if debug:
-                print(f"Debug: Fetching page at offset {offset}")
-                print(f"Debug: URL: {url}")
-                print(f"Debug: Headers: {headers}")
-                print(f"Debug: Data: {data}")
-            
-            r = api_request_with_retry(lambda: requests.post(url, headers=headers, json=data), debug=debug)
+        offsets = [offset + i * SEARCH_PAGE_SIZE for i in range(SEARCH_SPECULATIVE_PAGES)]
+        for page_offset, page in zip(offsets, executor.map(fetch_search_page, offsets)):
+            images = page.get("results", [])
+            if images:
+                yield page_offset, images
+            if len(images) < SEARCH_PAGE_SIZE:
+                logger.debug("Reached end of results (got %d < %d)", len(images), SEARCH_PAGE_SIZE)
+                return
+        offset += SEARCH_SPECULATIVE_PAGES * SEARCH_PAGE_SIZE
+
+def get_images_without_text_tag(limit=None, tag_cache=None):
+    """
+    Fetches all images from the project that have NO tag with prefix 'text-'.
+    Supports pagination (with pages fetched in parallel) and applies the limit only after filtering.
+    Images recorded in the tag cache as tagged are skipped as well, even if the search does
+    not show their tag yet.
+    """
+    all_filtered_images = []
+    executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS)
+    
+    try:
+        for offset, images in iter_search_pages(executor):
+            # Filter: only images, which have no tag starting with "text-"
+            filtered_page = [
+                img for img in images
+                if not any(t.startswith("text-") for t in img.get("tags", []))
+                and not (tag_cache is not None and img["id"] in tag_cache)
+            ]
+            all_filtered_images.extend(filtered_page)
             
-            if debug:
-                print(f"Debug: Response status: {r.status_code}, Response body length: {len(r.text)}")
+            logger.debug("Page %d: %d total, %d filtered, %d filtered so far",
+                         offset // SEARCH_PAGE_SIZE + 1, len(images), len(filtered_page), len(all_filtered_images))
             
-            if r.status_code == 200:
-                response_json = r.json()
-                images = response_json.get("results", [])
-                
-                if not images:
-                    # No more images available
-                    if debug:
-                        print(f"Debug: No more images at offset {offset}")
-                    break
-                
-                # Filter: only images, which have no tag starting with "text-"
-                filtered_page = [img for img in images if not any(t.startswith("text-") for t in img.get("tags", []))]
-                all_filtered_images.extend(filtered_page)
-                
-                if debug:
-                    print(f"Debug: Page {offset//page_size + 1}: {len(images)} total, {len(filtered_page)} filtered")
-                    print(f"Debug: Total filtered so far: {len(all_filtered_images)}")
-                
-                # Check if the limit has already been reached
-                if limit is not None and len(all_filtered_images) >= limit:
-                    if debug:
-                        print(f"Debug: Limit of {limit} filtered images reached")
-                    all_filtered_images = all_filtered_images[:limit]
-                    break
-                
-                # If fewer images were returned than expected, we're at the end
-                if len(images) < page_size:
-                    if debug:
-                        print(f"Debug: Reached end of results (got {len(images)} < {page_size})")
-                    break
-                
-                offset += page_size
-                
-            else:
-                print(f"Error fetching images: {r.status_code} {r.text}")
-                print("Stopping application due to API error.")
-                sys.exit(1)
-                
-        except Exception as e:
-            print(f"Error fetching images: {e}")
-            print("Stopping application due to unexpected error.")
-            sys.exit(1)
+            # Check if the limit has already been reached
+            if limit is not None and len(all_filtered_images) >= limit:
+                logger.debug("Limit of %d filtered images reached", limit)
+                all_filtered_images = all_filtered_images[:limit]
+                break
+    except Exception as e:
+        print(f"Error fetching images: {e}")
+        print("Stopping application due to unexpected error.")
+        sys.exit(1)
+    finally:
+        # Pages that are no longer needed (limit reached) are not fetched anymore
+        executor.shutdown(wait=True, cancel_futures=True)
     
-    if debug:
-        print(f"Debug: Final result: {len(all_filtered_images)} images without 'text-' tag.")
+    logger.debug("Final result: %d images without 'text-' tag.", len(all_filtered_images))
     
     return all_filtered_images
 
+def get_image_url(image_id):
+    """
+    Fetches the download URL of the original image file from the image details.
+    Returns None if there is none.
+    """
+    details_url = IMAGE_URL_TMPL.format(image_id=image_id)
+    
+    try:
+        r = api_request_with_retry(lambda: SESSION.get(details_url))
+        if r.status_code != 200:
+            print(f"Error fetching image details {image_id}: {r.status_code}")
+            return None
+        details = parse_json(r)
+        image_url = None
+        if 'image' in details and 'urls' in details['image'] and 'original' in details['image']['urls']:
+            image_url = details['image']['urls']['original']
+        if not image_url:
+            print(f"No image url found in details for {image_id}")
+            return None
+        logger.debug("Image download url: %s", image_url)
+        return image_url
+    except Exception as e:
+        print(f"Error fetching image details {image_id}: {e}")
+        return None
+
+# ==== Tag cache ====
+
+class TagCache:
+    """
+    Persistent record of the images tagged with this app (image_id -> tag), per project.
+    
+    Stored as JSON in the user's home directory, so images tagged in a previous session are
+    skipped on the next start, and tagging can be resumed after a crash.
+    """
+
+    def __init__(self, path=TAG_CACHE_PATH):
+        self.path = path
+        self._project = f"{WORKSPACE}/{PROJECT}"
+        self._data = {}
+        self._pending = 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable tag cache {path}: {e}")
+        self._tags = self._data.setdefault(self._project, {})
+
+    def __contains__(self, image_id):
+        return image_id in self._tags
+
+    def set(self, image_id, tag):
+        """Records a tag; the file is written every TAG_CACHE_FLUSH_INTERVAL updates."""
+        self._tags[image_id] = tag
+        self._pending += 1
+        if self._pending >= TAG_CACHE_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Writes the cache file, if anything has changed."""
+        if not self._pending:
+            return
+        # Write to a temporary file first, so an interrupted write never breaks the cache
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._data, f)
+            os.replace(tmp_path, self.path)
+            self._pending = 0
+        except OSError as e:
+            print(f"Warning: Could not write tag cache {self.path}: {e}")
+
 # ==== UI ====
-import tempfile
-import shutil
+
+class PrefetchQueue:
+    """
+    Downloads the images following the current one in the background, so they are
+    ready when the user moves on.
+    """
+
+    def __init__(self, download, images, depth=PREFETCH_COUNT):
+        self._download = download
+        self._images = images
+        self._depth = depth
+        self._pool = ThreadPoolExecutor(max_workers=depth)
+        self._futures = {}  # image index -> Future of the download result
+
+    def request(self, idx):
+        """
+        Returns a Future of the download result for an image, reusing the background download
+        if there is one, and starts the downloads of the images following it.
+        """
+        future = self._futures.pop(idx, None)
+        if future is None:
+            future = self._pool.submit(self._download, self._images[idx])
+        self.advance(idx)
+        return future
+
+    def advance(self, idx):
+        """Starts background downloads for the images following idx, unless already running."""
+        for i in range(idx + 1, min(idx + 1 + self._depth, len(self._images))):
+            if i not in self._futures:
+                self._futures[i] = self._pool.submit(self._download, self._images[i])
+
+    def close(self):
+        """Cancels pending downloads."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._futures.clear()
 
 
 class TagApp:
-    def __init__(self, images, debug=False):
+    def __init__(self, images, tag_cache=None):
         self.images = images
         self.idx = 0
         self.total = len(images)
-        self.debug = debug
         self.last_tagged = {}  # image_id -> last tag
+        self.tag_cache = tag_cache
+        
+        # Session with connection pooling for the image files, shared by all download threads.
+        # Separate from the API session, so the API key is not sent to the storage URLs.
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+        self._session.mount("https://", adapter)
+        
+        # Background download, decoding and scaling of the next images (ready-to-show RGB arrays)
+        self._prefetch = PrefetchQueue(self.load_image, images)
+        
+        # LRU cache of downloaded images: image_id -> encoded bytes. Filled by the download threads.
+        self._image_cache = OrderedDict()
+        self._image_cache_lock = threading.Lock()
+        
+        # Resize on the GPU via OpenCL (UMat) when available, otherwise on the CPU
+        self._use_opencl = cv2.ocl.haveOpenCL() and cv2.ocl.useOpenCL()
+        
+        # Look up the download URLs of the images around the current one in parallel:
+        # image_id -> Future of the URL. Downloads then only need to fetch the file itself.
+        # The window moves with the current image (see _lookup_urls).
+        self._url_pool = ThreadPoolExecutor(max_workers=URL_LOOKUP_WORKERS)
+        self.image_urls = {}
+        self._image_urls_lock = threading.Lock()
+        
+        # Tk window with a single label showing the current image; keys are handled as events
+        self.root = tk.Tk()
+        self.root.title("Text Orientation Tagging App")
+        self.root.configure(background="black")
+        self.label = tk.Label(self.root, background="black")
+        self.label.pack()
+        self.root.bind("<Key>", self._on_key)
+        self.root.protocol("WM_DELETE_WINDOW", self.exit)
+        self._tkimg = None
+        self._pending = None  # Future of the download of the image to show next
+        self._shown = False
+
+    def close(self):
+        """Stops pending downloads and releases the HTTP connections."""
+        self._url_pool.shutdown(wait=True, cancel_futures=True)
+        self._prefetch.close()
+        self._session.close()
+        if self.tag_cache is not None:
+            self.tag_cache.flush()
+
+    def _lookup_urls(self, idx):
+        """
+        Starts the URL lookups for the current image and the URL_LOOKUP_DEPTH images following it,
+        and cancels queued lookups for images that have fallen out of that window. Resolved URLs
+        are kept for revisits.
+        """
+        window = {img["id"] for img in self.images[idx:idx + 1 + URL_LOOKUP_DEPTH]}
+        with self._image_urls_lock:
+            for image_id, future in list(self.image_urls.items()):
+                if image_id not in window and not future.done() and future.cancel():
+                    del self.image_urls[image_id]
+            for image_id in window:
+                if image_id not in self.image_urls:
+                    self.image_urls[image_id] = self._url_pool.submit(get_image_url, image_id)
+
+    def _get_image_url(self, image_id):
+        """Returns the download URL of an image, from the background lookup if there is one."""
+        with self._image_urls_lock:
+            future = self.image_urls.get(image_id)
+        if future is not None:
+            try:
+                return future.result()
+            except CancelledError:
+                pass  # Fell out of the lookup window in the meantime
+        return get_image_url(image_id)
 
     def download_image(self, img_info):
+        """Downloads an image and returns its encoded bytes, or None on failure."""
         image_id = img_info["id"]
-        headers = {"Authorization": f"Bearer {API_KEY}"}
         
-        # 1. Fetch image details (contains 'image' with 'urls' and 'original')
-        details_url = f"https://api.roboflow.com/{WORKSPACE}/{PROJECT}/images/{image_id}"
+        with self._image_cache_lock:
+            data = self._image_cache.get(image_id)
+            if data is not None:
+                self._image_cache.move_to_end(image_id)
+                return data
+        
+        # The URL is usually resolved already by the background lookup (and kept for revisits)
+        image_url = self._get_image_url(image_id)
+        if not image_url:
+            return None
         
         try:
-            r = api_request_with_retry(lambda: requests.get(details_url, headers=headers), debug=self.debug)
-            if r.status_code != 200:
-                print(f"Error fetching image details {image_id}: {r.status_code}")
-                return None
-            details = r.json()
-            image_url = None
-            if 'image' in details and 'urls' in details['image'] and 'original' in details['image']['urls']:
-                image_url = details['image']['urls']['original']
-            if not image_url:
-                print(f"No image url found in details for {image_id}")
-                return None
-            if self.debug:
-                print(f"Image download url: {image_url}")
-                
-            # 2. Fetch actual image
-            r_img = api_request_with_retry(lambda: requests.get(image_url, stream=True), debug=self.debug)
+            r_img = api_request_with_retry(lambda: self._session.get(image_url))
             if r_img.status_code == 200 and r_img.headers.get("Content-Type", "").startswith("image/"):
-                tmp_fd, tmp_path = tempfile.mkstemp(suffix=".jpg")
-                with os.fdopen(tmp_fd, "wb") as f:
-                    shutil.copyfileobj(r_img.raw, f)
-                if self.debug:
-                    print(f"Downloaded image to {tmp_path}")
-                return tmp_path
+                # Kept in memory, decoded later with cv2.imdecode
+                data = r_img.content
+                logger.debug("Downloaded image %s (%d bytes)", image_id, len(data))
+                with self._image_cache_lock:
+                    self._image_cache[image_id] = data
+                    if len(self._image_cache) > IMAGE_CACHE_SIZE:
+                        self._image_cache.popitem(last=False)
+                return data
             else:
                 print(f"Error downloading image file {image_id}: {r_img.status_code} {r_img.headers.get('Content-Type')} {r_img.text[:200]}")
                 return None
@@ -300,70 +559,143 @@ class TagApp:
             print(f"Error downloading image {image_id}: {e}")
             return None
 
-    def show_image(self):
+    def show_current_image(self):
+        """
+        Shows the current image as soon as it has been downloaded. Images that cannot be
+        downloaded are skipped; after the last image the app is closed.
+        """
+        if not 0 <= self.idx < self.total:
+            print("All images tagged!")
+            self.exit()
+            return
+        
+        # Tag keys are ignored until the image is visible
+        self._shown = False
+        
+        # Move the URL lookup window along, ahead of the downloads
+        self._lookup_urls(self.idx)
+        
+        # Use the prefetched download if there is one, and keep the next images downloading
+        self._pending = self._prefetch.request(self.idx)
+        self.root.after(0, self._poll_download, self.idx, self._pending)
+
+    def _poll_download(self, idx, future):
+        """Waits for a download without blocking the event loop, then shows the image."""
+        if future is not self._pending:
+            return  # The user has moved on in the meantime
+        if not future.done():
+            self.root.after(DOWNLOAD_POLL_INTERVAL, self._poll_download, idx, future)
+            return
+        
+        # A failed load (e.g. an OpenCV error while decoding or scaling) skips the image like a failed download
+        try:
+            img = future.result()
+        except Exception as e:
+            print(f"Error loading image: {e}")
+            img = None
+        
+        if self.show_image(img):
+            self._shown = True
+        else:
+            self.idx += 1
+            self.show_current_image()
+
+    def load_image(self, img_info):
+        """
+        Downloads and decodes an image and scales it to the display size. Runs on the prefetch
+        threads, so the image is ready to show when the user gets to it.
+        
+        Returns:
+            RGB image as numpy array, or None if the image could not be downloaded or decoded
+        """
+        data = self.download_image(img_info)
+        if data is None:
+            return None
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            return None
+        
+        img = cv2.cvtColor(self.fit_to_display(img), cv2.COLOR_BGR2RGB)
+        if isinstance(img, cv2.UMat):
+            img = img.get()
+        return img
+
+    def show_image(self, img):
         img_info = self.images[self.idx]
-        tmp_path = self.download_image(img_info)
-        if not tmp_path or not os.path.exists(tmp_path):
-            print(f"Image not found or could not be downloaded: {img_info.get('name', img_info.get('id'))}")
-            return False, None
-        img = cv2.imread(tmp_path)
         if img is None:
-            print(f"Image could not be read: {tmp_path}")
-            os.remove(tmp_path)
-            return False, None
-        img = cv2.resize(img, (800, 400))
-        cv2.imshow("Text Orientation Tagging App", img)
-        return True, tmp_path
+            print(f"Image not found or could not be loaded: {img_info.get('name', img_info.get('id'))}")
+            return False
+        
+        # Keep a reference, else Tk shows an empty image once the PhotoImage is garbage collected
+        self._tkimg = ImageTk.PhotoImage(Image.fromarray(img), master=self.root)
+        self.label.configure(image=self._tkimg)
+        self.root.title(f"Text Orientation Tagging App - {self.idx + 1}/{self.total}: {img_info.get('name', img_info.get('id'))}")
+        return True
+
+    def fit_to_display(self, img):
+        """Scales an image into the display area, keeping its aspect ratio, with black bars around it."""
+        h, w = img.shape[:2]
+        scale = min(DISPLAY_WIDTH / w, DISPLAY_HEIGHT / h)
+        new_w = max(1, int(w * scale))
+        new_h = max(1, int(h * scale))
+        
+        if self._use_opencl:
+            img = cv2.UMat(img)
+        # INTER_AREA gives proper (and fast) downscaling; small images are scaled up bilinearly
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        img = cv2.resize(img, (new_w, new_h), interpolation=interpolation)
+        
+        top = (DISPLAY_HEIGHT - new_h) // 2
+        left = (DISPLAY_WIDTH - new_w) // 2
+        return cv2.copyMakeBorder(img, top, DISPLAY_HEIGHT - new_h - top, left, DISPLAY_WIDTH - new_w - left,
+                                  cv2.BORDER_CONSTANT, value=(0, 0, 0))
 
     def set_tag(self, tag):
         img_info = self.images[self.idx]
         image_id = img_info["id"]
-        ok = set_tag(image_id, tag, self.debug, self.last_tagged)
+        ok = set_tag(image_id, tag, self.last_tagged)
         if ok:
             self.last_tagged[image_id] = tag
+            if self.tag_cache is not None:
+                self.tag_cache.set(image_id, tag)
         else:
             print(f"Tagging failed for image {img_info.get('name', image_id)}")
         self.idx += 1
 
+    def _on_key(self, event):
+        key = event.keysym
+        if key in TAG_KEYS:  # w/s/a/d: up, down, left, right
+            if not self._shown:
+                return
+            self.set_tag(TAG_KEYS[key])
+        elif key == "space":  # Skip
+            self.idx += 1
+        elif key == "b":  # Back to previous image
+            if self.idx > 0:
+                self.idx -= 1
+                print("Back to previous image.")
+            else:
+                print("Already at first image.")
+                return
+        elif key == "Escape":  # ESC to exit
+            print("Exiting application...")
+            self.exit()
+            return
+        else:
+            return
+        self.show_current_image()
+
+    def exit(self):
+        """Closes the window, which ends run()."""
+        self._pending = None
+        self.root.destroy()
+
     def run(self):
-        while 0 <= self.idx < self.total:
-            ok, tmp_path = self.show_image()
-            if not ok:
-                self.idx += 1
-                continue
-
-            key = cv2.waitKey(0) & 0xFF
-            if key == ord('w'):  # Up
-                self.set_tag("text-upright")
-            elif key == ord('s'):  # Down
-                self.set_tag("text-upside-down")
-            elif key == ord('a'):  # Left
-                self.set_tag("text-rotated-left")
-            elif key == ord('d'):  # Right
-                self.set_tag("text-rotated-right")
-            elif key == ord(' '):  # Skip
-                self.idx += 1
-            elif key == ord('b'): # Back to previous image
-                if self.idx > 0:
-                    self.idx -= 1
-                    print("Back to previous image.")
-                else:
-                    print("Already at first image.")
-                if tmp_path and os.path.exists(tmp_path):
-                    os.remove(tmp_path)
-                continue
-            elif key == 27:  # ESC to exit
-                print("Exiting application...")
-                cv2.destroyAllWindows()
-                if tmp_path and os.path.exists(tmp_path):
-                    os.remove(tmp_path)
-                exit(0)
-
-            if tmp_path and os.path.exists(tmp_path):
-                os.remove(tmp_path)
-
-        print("All images tagged!")
-        cv2.destroyAllWindows()
+        self.show_current_image()
+        try:
+            self.root.mainloop()
+        finally:
+            self.close()
 
 # Update the main block to handle export directory argument
 if __name__ == "__main__":
@@ -371,6 +703,7 @@ if __name__ == "__main__":
     parser.add_argument("-h", "--help", action="store_true", help="Show help text")
     parser.add_argument("-d", "--debug", action="store_true", help="Enable debug mode")
     parser.add_argument("-l", "--limit", type=int, help="Max. number of images to tag")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore the local record of already tagged images")
     args = parser.parse_args()
 
     if args.help:
@@ -378,15 +711,19 @@ if __name__ == "__main__":
         exit(0)
 
     print_help()  # Show help text on start
+    
+    logging.basicConfig(format="%(levelname)s: %(message)s")
+    logger.setLevel(logging.DEBUG if args.debug else logging.INFO)
 
-    DEBUG_MODE = args.debug
     LIMIT = args.limit
 
+    tag_cache = None if args.no_cache else TagCache()
+
     print("Fetching images without 'text-' tag from Roboflow...")
-    images = get_images_without_text_tag(DEBUG_MODE, LIMIT)
+    images = get_images_without_text_tag(LIMIT, tag_cache)
     if not images:
         print("No images found without 'text-' tag.")
         exit(1)
 
-    app = TagApp(images, debug=DEBUG_MODE)
+    app = TagApp(images, tag_cache=tag_cache)
     app.run()
@@ -1,23 +1,38 @@
 import os
 import sys
+import functools
 import logging
 import threading
 import eventlet
 import sqlite3
 import signal
-from datetime import datetime
+import stat
+from collections import OrderedDict
+from urllib.parse import quote
 
-# Apply eventlet monkey-patching.
+# Apply eventlet monkey-patching when started directly (python app.py).
 #   Note this has to be done HERE, before importing any other modules. The module throws an
 #   exception if not done at the beginning.
 #   Without monkey patching, Flask-SocketIO may use blocking standard libraries, which 
 #   results in WebSocket messages not being processed correctly. Monkey patching ensures 
 #   that all relevant operations are non-blocking and work together with eventlet.
-eventlet.monkey_patch()
+#   Under gunicorn, the eventlet worker patches before loading the app, and threaded (gthread)
+#   workers must not be patched, so importing this module leaves the standard library alone.
+if __name__ == '__main__':
+    eventlet.monkey_patch()
+
+from eventlet import tpool
+from eventlet.semaphore import Semaphore
 
-from flask import Flask, request, render_template, jsonify, redirect, send_file, abort
+from flask import Flask, Response, request, render_template, jsonify, redirect, send_file, send_from_directory, abort, make_response
 from flask_socketio import SocketIO
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from libs.logging import get_logger, SocketManager
 from libs.database_manager import DatabaseManager
 from libs.utils.general_utils import get_next_directory
@@ -30,6 +45,36 @@ import config
 # Module-specific logger that uses the module name as a prefix for log messages
 logger = get_logger(__name__)
 
+# Number of run logs kept in memory for repeated views of the run page
+LOG_CACHE_SIZE = 16
+
+# File name of a run's log within its output directory
+LOG_FILE_NAME = "run_{run_id}.log"
+
+# MIME types of the images served by serve_image, by file extension
+IMAGE_MIME_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif'
+}
+
+
+def ojsonify(obj, status=200):
+    """Like jsonify, but serializes with orjson if available (several times faster on large responses)."""
+    if not ORJSON_AVAILABLE:
+        response = jsonify(obj)
+        response.status_code = status
+        return response
+    return Response(orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS), status=status, mimetype='application/json')
+
+
+def _read_file(path):
+    """Reads a text file. Called via _blocking, as regular file reads would block the eventlet hub."""
+    with open(path, 'r') as f:
+        return f.read()
+
+
 class BooksOnShelvesApp(Flask):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -42,24 +87,104 @@ class BooksOnShelvesApp(Flask):
         self.db_manager = DatabaseManager(os.path.join(os.getcwd(), "bookshelves.db"))
         
         # Register routes
-        self.route("/")(self.index)
-        self.route("/run", methods=['GET', 'POST'])(self.run_page)
-        self.route("/runs")(self.get_runs)
-        self.route("/runs/<run_id>/bookspines")(self.get_bookspines)
-        self.route("/image/<run_id>")(self.serve_image)
-        self.route("/log/<run_id>")(self.get_log_content)
+        self.url_map.strict_slashes = False
+        self.add_url_rule("/", endpoint="index", view_func=self.index, methods=['GET'])
+        self.add_url_rule("/run", endpoint="run_page", view_func=self.run_page, methods=['GET', 'POST'])
+        self.add_url_rule("/runs", endpoint="get_runs", view_func=self.get_runs, methods=['GET'])
+        self.add_url_rule("/runs/<run_id>/bookspines", endpoint="get_bookspines", view_func=self.get_bookspines, methods=['GET'])
+        self.add_url_rule("/image/<run_id>", endpoint="serve_image", view_func=self.serve_image, methods=['GET'])
+        self.add_url_rule("/log/<run_id>", endpoint="get_log_content", view_func=self.get_log_content, methods=['GET'])
+        self.add_url_rule("/log/<run_id>/raw", endpoint="get_raw_log", view_func=self.get_raw_log, methods=['GET'])
+
+        # Responses not going through orjson (see ojsonify) skip key sorting and indentation
+        self.json.sort_keys = False
+        self.json.compact = True
 
-        # Thread-Lock for creating output directories
-        self._output_dir_lock = threading.Lock()
+        # Let the front-end server send files, if it supports X-Sendfile
+        self.use_x_sendfile = config.USE_X_SENDFILE
+
+        # Whether request handlers may block (threaded workers) or must hand blocking calls to tpool
+        self.config['BLOCKING_OK'] = config.BLOCKING_OK
+
+        # Canonical project root, the only directory tree serve_image serves files from
+        self._home_dir = os.path.realpath(config.HOME_DIR)
+
+        # Lock for creating output directories; a green semaphore, so waiting for it yields to the hub
+        self._output_dir_lock = Semaphore(1)
+
+        # Finished runs don't change anymore, so their details are kept in memory: all finished runs
+        # are loaded with one query at startup, runs finishing later are added on their first lookup
+        self._finished_run_details = {
+            str(run['run_id']): {key: value for key, value in run.items() if key != 'status'}
+            for run in self.db_manager.get_all_runs()
+            if run['end_time']
+        }
+
+        # Log contents by path, revalidated against the file's mtime and size on every read
+        self._log_cache = OrderedDict()
+        self._log_cache_lock = threading.Lock()
 
     def __get_next_output_directory(self):
         """Thread-safe method to create the next output directory."""
         with self._output_dir_lock:
             output_dir = get_next_directory(config.OUTPUT_DIR)
-            os.makedirs(os.path.join(output_dir, "book"), exist_ok=True)
+            self._blocking(os.makedirs, os.path.join(output_dir, "book"), exist_ok=True)
             return output_dir
 
 
+    def _blocking(self, func, *args, **kwargs):
+        """Runs a blocking call, in eventlet's native thread pool unless blocking is fine (BLOCKING_OK)."""
+        if self.config['BLOCKING_OK']:
+            return func(*args, **kwargs)
+        return tpool.execute(func, *args, **kwargs)
+
+    def _get_run_details(self, run_id):
+        """Returns the run details, from memory for finished runs."""
+        run_details = self._finished_run_details.get(run_id)
+        if run_details is None:
+            run_details = self.db_manager.get_run_details(run_id)
+            if run_details and run_details['end_time']:
+                self._finished_run_details[run_id] = run_details
+        return run_details
+
+    def _resolve_log_path(self, run_details, run_id):
+        """Returns the path of the run's log file, or None if the run has no output directory."""
+        output_dir = run_details['output_dir']
+        if not output_dir:
+            return None
+        # Handle relative paths
+        if not os.path.isabs(output_dir):
+            output_dir = os.path.join(config.HOME_DIR, output_dir)
+        return os.path.join(output_dir, LOG_FILE_NAME.format(run_id=run_id))
+
+    def _read_log_cached(self, log_path):
+        """
+        Returns the content and size in bytes of a log file, or None if there is no such file.
+        The file is only re-read if it has changed since the last read.
+        """
+        try:
+            st = os.stat(log_path)
+        except FileNotFoundError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+
+        key = (st.st_mtime_ns, st.st_size)
+        with self._log_cache_lock:
+            cached = self._log_cache.get(log_path)
+            if cached and cached[0] == key:
+                self._log_cache.move_to_end(log_path)
+                return cached[1], st.st_size
+
+        log_content = self._blocking(_read_file, log_path)
+
+        with self._log_cache_lock:
+            self._log_cache[log_path] = (key, log_content)
+            self._log_cache.move_to_end(log_path)
+            if len(self._log_cache) > LOG_CACHE_SIZE:
+                self._log_cache.popitem(last=False)
+        return log_content, st.st_size
+
     def index(self):
         return render_template("index.html")
 
@@ -68,19 +193,26 @@ class BooksOnShelvesApp(Flask):
         # POST request means we're starting a new run
         if request.method == 'POST':
             # Get parameters from the request
-            source = request.form.get("source")
-            debug = request.form.get("debug", "0")
+            form = request.form
+            source = form.get("source")
+            debug = form.get("debug", "0")
             
             if not source:
-                return jsonify({"error": "No source given"}), 400
+                return ojsonify({"error": "No source given"}), 400
 
+            # Debug level comes straight from the form; only accept an integer and clamp it to the known levels
+            try:
+                debug = max(0, min(3, int(debug)))
+            except ValueError:
+                return ojsonify({"error": f"Invalid debug level: {debug}"}), 400
+
+            # Only the startup steps that can fail for external reasons are guarded:
+            # the file system, the database and starting the thread
             try:
                 output_dir = self.__get_next_output_directory()
                 
-                # Create run context with output directory
-                run_context = self.db_manager.create_run(
-                    start_time=datetime.now().isoformat(),
-                )
+                # Create run context; the database sets the start time
+                run_context = self.db_manager.create_run()
                 
                 # Start a new run with the run manager
                 self.run_manager.start_run(
@@ -94,20 +226,21 @@ class BooksOnShelvesApp(Flask):
                     source=source,
                     output_dir=output_dir,
                     run_context=run_context,
-                    debug=int(debug)
+                    debug=debug
                 )
                 
                 logger.info("🔍 Starting book detection...")
                 finder_thread.start()
 
-                # Watch for the thread to end
+                # Watch for the thread to end. The watcher only waits, so a greenlet is enough.
+                # (BookFinderThread is green as well after monkey-patching, so join() yields to the hub.)
                 def watcher():
                     finder_thread.join()
                     # Stop the run when the thread is done
                     self.run_manager.stop_run(run_context.run_id)
                     logger.info("✅ Book detection finished.")
                     
-                threading.Thread(target=watcher, daemon=True).start()
+                eventlet.spawn_n(watcher)
 
                 # We use the Post/Redirect/Get (PRG) pattern here for several important reasons:
                 # 1. Prevents duplicate form submissions if the user refreshes the page
@@ -121,37 +254,30 @@ class BooksOnShelvesApp(Flask):
                 # Alternative approach would be to render the template directly:
                 # return render_template("run.html", run_id=run_context.run_id, log_content="", view_mode=False)
                 # But this would cause issues with browser refreshes potentially starting new runs
-            except Exception as e:
+            except (OSError, sqlite3.Error, RuntimeError) as e:
                 logging.error(f"Error during startup of book detection: {str(e)}")
-                return jsonify({"error": str(e)}), 500
+                return ojsonify({"error": str(e)}), 500
                 
         # GET request means we're viewing an existing run
         else:
             run_id = request.args.get('run_id')
             if not run_id:
-                return jsonify({"error": "No Run ID provided"}), 400
+                return ojsonify({"error": "No Run ID provided"}), 400
                 
             # Get run details from database
-            run_details = self.db_manager.get_run_details(run_id)
+            run_details = self._get_run_details(run_id)
             if not run_details:
-                return jsonify({"error": f"Run ID {run_id} not found"}), 404
+                return ojsonify({"error": f"Run ID {run_id} not found"}), 404
                 
             # Get log content for this run
             log_content = ""
-            if run_details['output_dir']:
+            log_path = self._resolve_log_path(run_details, run_id)
+            if log_path:
                 try:
-                    # Handle relative paths
-                    output_dir = run_details['output_dir']
-                    if not os.path.isabs(output_dir):
-                        output_dir = os.path.join(config.HOME_DIR, output_dir)
-                    
-                    # Use the specific log file naming convention: run_<run-id>.log
-                    log_path = os.path.join(output_dir, f"run_{run_id}.log")
-                    
-                    if os.path.exists(log_path) and os.path.isfile(log_path):
-                        with open(log_path, 'r') as f:
-                            log_content = f.read()
-                            logger.debug(f"Found log file: {log_path}")
+                    log = self._read_log_cached(log_path)
+                    if log:
+                        log_content = log[0]
+                        logger.debug(f"Found log file: {log_path}")
                     else:
                         logger.warning(f"Log file not found: {log_path}")
                 except Exception as e:
@@ -173,114 +299,144 @@ class BooksOnShelvesApp(Flask):
         """Returns a list of all runs."""
         try:
             runs = self.db_manager.get_all_runs()
-            return jsonify({"runs": runs})
+            return ojsonify({"runs": runs})
         except Exception as e:
             logging.error(f"Error on retrieving runs: {str(e)}")
-            return jsonify({"error": str(e)}), 500
+            return ojsonify({"error": str(e)}), 500
 
     def get_bookspines(self, run_id):
         """Returns all detected bookspines for a specific run."""
         try:
             bookspines = self.db_manager.get_bookspines_for_run(run_id)
-            return jsonify(bookspines)
+            response = ojsonify(bookspines)
+
+            # Let browsers revalidate with If-None-Match and get an empty 304 if nothing has changed
+            response.add_etag()
+            response.make_conditional(request)
+
+            # Bookspines of finished runs never change, so there is no need to ask again
+            run_details = self._get_run_details(run_id)
+            if run_details and run_details['end_time']:
+                response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+            return response
         except Exception as e:
             logging.error(f"Error on retrieving bookspines: {str(e)}")
-            return jsonify({"error": str(e)}), 500
+            return ojsonify({"error": str(e)}), 500
             
     def get_log_content(self, run_id):
         """Returns the log content for a specific run."""
         try:
             # Get run details from database
-            run_details = self.db_manager.get_run_details(run_id)
+            run_details = self._get_run_details(run_id)
             if not run_details:
-                return jsonify({"error": f"Run ID {run_id} not found"}), 404
+                return ojsonify({"error": f"Run ID {run_id} not found"}), 404
                 
             # Check if output directory exists
-            if not run_details['output_dir']:
-                return jsonify({"error": "No output directory found for this run"}), 404
+            log_path = self._resolve_log_path(run_details, run_id)
+            if not log_path:
+                return ojsonify({"error": "No output directory found for this run"}), 404
                 
-            # Handle relative paths
-            output_dir = run_details['output_dir']
-            if not os.path.isabs(output_dir):
-                output_dir = os.path.join(config.HOME_DIR, output_dir)
-                
-            # Use the specific log file naming convention: run_<run-id>.log
-            log_path = os.path.join(output_dir, f"run_{run_id}.log")
-            
-            if os.path.exists(log_path) and os.path.isfile(log_path):
-                with open(log_path, 'r') as f:
-                    log_content = f.read()
-                    logger.info(f"Found log file: {log_path}")
-                return jsonify({"log_content": log_content})
+            log = self._read_log_cached(log_path)
+            if log:
+                log_content, size = log
+                logger.info(f"Found log file: {log_path}")
+                return ojsonify({"log_content": log_content, "size": size})
             else:
                 logger.warning(f"Log file not found: {log_path}")
-                return jsonify({"error": "Log file not found"}), 404
+                return ojsonify({"error": "Log file not found"}), 404
                 
         except Exception as e:
             logging.error(f"Error retrieving log content: {str(e)}")
-            return jsonify({"error": str(e)}), 500
+            return ojsonify({"error": str(e)}), 500
             
+    def get_raw_log(self, run_id):
+        """
+        Serves the log file of a run as plain text. Supports HTTP Range requests, so clients
+        polling a live run can fetch only the bytes appended since their last request
+        (e.g. 'Range: bytes=<size>-', with the size known from /log/<run_id>).
+        """
+        run_details = self._get_run_details(run_id)
+        if not run_details:
+            return ojsonify({"error": f"Run ID {run_id} not found"}), 404
+        log_path = self._resolve_log_path(run_details, run_id)
+        if not log_path:
+            return ojsonify({"error": "No output directory found for this run"}), 404
+
+        # Flask answers Range and If-Modified-Since requests itself and raises NotFound for missing files
+        return send_from_directory(os.path.dirname(log_path), os.path.basename(log_path), mimetype='text/plain', conditional=True)
+
     def serve_image(self, run_id):
         """Serves an image file based on the run_id and path."""
         try:
             # Get the image path from the query parameters
             image_path = request.args.get('path')
             if not image_path:
-                return jsonify({"error": "No image path provided"}), 400
-                
-            # For security, ensure the path doesn't contain '..' to prevent directory traversal
-            if '..' in image_path:
-                return jsonify({"error": "Invalid image path"}), 400
+                return ojsonify({"error": "No image path provided"}), 400
                 
-            # Check if the path is absolute or relative
-            if os.path.isabs(image_path):
-                # If absolute, use it directly
-                full_path = image_path
-            else:
-                # If relative, resolve it relative to the project root
-                full_path = os.path.join(config.HOME_DIR, image_path)
+            # Resolve the path (relative paths are relative to the project root) including any
+            # '..' and symlinks, and only serve files within the project root
+            full_path = os.path.realpath(os.path.join(self._home_dir, image_path))
+            if not full_path.startswith(self._home_dir + os.sep):
+                return ojsonify({"error": "Invalid image path"}), 400
                 
             # Check if the file exists
-            if not os.path.isfile(full_path):
+            try:
+                st = os.stat(full_path)
+            except OSError:
+                st = None
+            if st is None or not stat.S_ISREG(st.st_mode):
                 logger.error(f"Image file not found: {full_path}")
-                return jsonify({"error": "Image file not found"}), 404
+                return ojsonify({"error": "Image file not found"}), 404
+
+            # Images are written once per run, so mtime and size identify their content
+            etag = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+            if etag in request.if_none_match:
+                return '', 304
                 
             # Determine the MIME type based on the file extension
             _, ext = os.path.splitext(full_path)
-            mime_type = {
-                '.jpg': 'image/jpeg',
-                '.jpeg': 'image/jpeg',
-                '.png': 'image/png',
-                '.gif': 'image/gif'
-            }.get(ext.lower(), 'application/octet-stream')
+            mime_type = IMAGE_MIME_TYPES.get(ext.lower(), 'application/octet-stream')
             
+            # Behind Nginx, let it send the file so the eventlet worker only writes the headers
+            if config.X_ACCEL_REDIRECT_PREFIX:
+                rel_path = full_path[len(self._home_dir) + 1:]
+                response = make_response('')
+                response.headers['X-Accel-Redirect'] = config.X_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + quote(rel_path.replace(os.sep, '/'))
+                response.headers['Content-Type'] = mime_type
+                return response
+
             # Serve the file
-            return send_file(full_path, mimetype=mime_type)
+            return send_file(full_path, mimetype=mime_type, conditional=True,
+                             etag=etag, last_modified=st.st_mtime, max_age=86400)
             
         except Exception as e:
             logger.error(f"Error serving image: {str(e)}")
-            return jsonify({"error": str(e)}), 500
+            return ojsonify({"error": str(e)}), 500
 
 
-# Register signal handler for SIGINT when app is shut down using Ctrl/Cmd-C
-def handle_sigint(signal_received, frame):
-    """Handles SIGINT (Ctrl-C) to clean up resources."""
+def handle_sigint(flask_app, signal_received, frame):
+    """Handles SIGINT (Ctrl-C) to clean up the resources of the app."""
     logging.info("Execution interrupted. Freeing resources...")
     
-    if hasattr(flask_app, 'run_manager'):
-        flask_app.run_manager.cleanup()
-    
-    if hasattr(flask_app, 'socket_manager'):
-        flask_app.socket_manager.teardown()
+    flask_app.run_manager.cleanup()
+    flask_app.socket_manager.teardown()
     
     flask_app.logger.info("📘 Bookfinder Server stopped.")
     exit(0)
 
-signal.signal(signal.SIGINT, handle_sigint)
+def create_app():
+    """
+    Creates the application, e.g. for gunicorn: gunicorn -k eventlet -w 1 'app:create_app()'
+    (gunicorn handles the signals of its workers itself).
+    """
+    return BooksOnShelvesApp(__name__)
 
 # Create an instance of the BooksOnShelvesApp class and run the application
 if __name__ == '__main__':
-    flask_app = BooksOnShelvesApp(__name__)
+    flask_app = create_app()
+    
+    # Register signal handler for SIGINT when app is shut down using Ctrl/Cmd-C
+    signal.signal(signal.SIGINT, functools.partial(handle_sigint, flask_app))
     
     flask_app.logger.info("📘 Bookfinder Server started and listening for requests on http://0.0.0.0:5010")
     flask_app.socket_manager.run_server(flask_app, host='0.0.0.0', port=5010)
@@ -13,6 +13,26 @@ SUPPORTED_LANGUAGES = ["de"]
 OCR_LANGUAGES = 'deu+eng'  # German + English covers most cases
 OCR_PSM_MODE = 6  # Uniform block of text (good for book spines)
 
+# Image file offloading
+#
+#   When the app runs behind Nginx, set X_ACCEL_REDIRECT_PREFIX to an internal location that
+#   aliases HOME_DIR (e.g. "/_protected/"). Images are then sent by Nginx and the app only
+#   answers with an X-Accel-Redirect header. If unset, images are served by the app itself.
+X_ACCEL_REDIRECT_PREFIX = os.getenv("X_ACCEL_REDIRECT_PREFIX", "")
+
+#   Behind Apache (mod_xsendfile) or lighttpd, set USE_X_SENDFILE=1 instead: files sent with
+#   send_file (images and raw logs) then only get an X-Sendfile header. Never set it without such a
+#   server in front, as clients would receive empty responses.
+USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "0") == "1"
+
+# Blocking calls in request handlers
+#
+#   Under the eventlet server, file I/O in request handlers is handed to a native thread pool, as
+#   it would otherwise block all other requests and socket.io connections. Set BLOCKING_OK=1 when
+#   the HTTP endpoints are served by threaded workers (e.g. gunicorn -k gthread, see
+#   docs/DEVELOPMENT.md), where blocking is fine and the handoff is only overhead.
+BLOCKING_OK = os.getenv("BLOCKING_OK", "0") == "1"
+
 # Initialise the logging framework
 #
 #   The log level can be controlled via the LOG_LEVEL environment variable, and the log file
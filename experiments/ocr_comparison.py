@@ -4,7 +4,7 @@ OCR Comparison Test: EasyOCR vs Tesseract
 Compares different OCR approaches with and without preprocessing
 
 Usage:
-python ocr_test.py <image_path>
+python ocr_test.py <image_path> [<image_path> ...]
 
 Example:
 python ocr_test.py output/predict110/book/Books_00005_rotated-180_1.jpg
@@ -12,10 +12,21 @@ python ocr_test.py output/predict110/book/Books_00005_rotated-180_1.jpg
 
 import sys
 import os
+
+# Cores available to this process (in a container, that can be fewer than os.cpu_count()).
+# OMP_NUM_THREADS has to be set before OpenCV and PyTorch are loaded to take effect.
+CPU_COUNT = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+os.environ.setdefault('OMP_NUM_THREADS', str(CPU_COUNT))
+
 import cv2
 import numpy as np
 import time
 import argparse
+import contextlib
+import functools
+import io
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add the project root directory to the Python path
@@ -23,6 +34,12 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 # Import OCR libraries
 import pytesseract
+try:
+    # Binds libtesseract directly, without starting a tesseract process per image
+    from tesserocr import PyTessBaseAPI, PSM, OEM, RIL
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
 try:
     import easyocr
     EASYOCR_AVAILABLE = True
@@ -36,17 +53,104 @@ try:
 except ImportError:
     LIBS_AVAILABLE = False
 
+# Let OpenCV's parallel filters (bilateral filter, CLAHE) use all cores instead of its container default
+cv2.setNumThreads(CPU_COUNT)
+
+def opencv_parallel_framework():
+    """
+    Returns the parallel framework OpenCV was built with (e.g. 'TBB', 'OpenMP', 'pthreads'), or None
+    """
+    for line in cv2.getBuildInformation().splitlines():
+        if line.strip().startswith('Parallel framework:'):
+            framework = line.split(':', 1)[1].strip()
+            return None if framework.lower() in ('', 'none') else framework
+    return None
+
+# LSTM engine only (skips loading the legacy engine's data), uniform block of text
+TESSERACT_CONFIG = '--oem 1 --psm 6'
+
+# Text line height (in pixels) the images are resized to before OCR
+TARGET_LINE_HEIGHT = 36
+
+# Writes debug images in the background, so OCR doesn't wait for the disk
+_debug_writer = ThreadPoolExecutor(max_workers=1)
+
+def save_debug_image(debug_filename, img):
+    """
+    Saves a debug image (as PNG, with fast compression) on the background writer
+    """
+    _debug_writer.submit(cv2.imwrite, debug_filename, img, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+
+def wait_for_debug_images():
+    """
+    Waits until the background writer has saved all debug images submitted so far
+    """
+    _debug_writer.submit(lambda: None).result()
+
+@functools.lru_cache(maxsize=None)
+def _get_tesseract_api():
+    """
+    Returns the shared tesserocr API, set up like the pytesseract call (deu+eng, --oem 1 --psm 6).
+    Returns None if it can't be created (e.g. missing language data), so pytesseract is used instead.
+    """
+    try:
+        return PyTessBaseAPI(lang='deu+eng', psm=PSM.SINGLE_BLOCK, oem=OEM.LSTM_ONLY)
+    except RuntimeError as e:
+        print(f"⚠️ Could not create Tesseract engine, using pytesseract: {e}")
+        return None
+
+def _tesseract_image_to_string(img):
+    """
+    Runs Tesseract on an image (grayscale or BGR numpy array), via tesserocr if its engine is available.
+    """
+    api = _get_tesseract_api() if TESSEROCR_AVAILABLE else None
+    if api is None:
+        return pytesseract.image_to_string(img, lang='deu+eng', config=TESSERACT_CONFIG)
+    
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    img = np.ascontiguousarray(img)
+    api.SetImageBytes(img.tobytes(), img.shape[1], img.shape[0], 1 if img.ndim == 2 else 3, img.strides[0])
+    return api.GetUTF8Text()
+
+def resolve_device(device):
+    """
+    Resolves the --device option to 'cuda', 'mps' or 'cpu'. 'auto' picks the first available GPU.
+    """
+    if device != 'auto':
+        return device
+    import torch  # Installed with EasyOCR
+    if torch.cuda.is_available():
+        return 'cuda'
+    if torch.backends.mps.is_available():
+        return 'mps'
+    return 'cpu'
+
+@functools.lru_cache(maxsize=None)
+def _get_reader(langs, device):
+    """
+    Returns the EasyOCR Reader for the given languages (a tuple) and device ('cuda', 'mps' or 'cpu').
+    Loading its models takes seconds, so it is created once per process and reused.
+    """
+    print(f"🔄 Initializing EasyOCR Reader on {device}...")
+    init_start = time.time()
+    # EasyOCR takes the device name as gpu argument, and False for the CPU
+    reader = easyocr.Reader(list(langs), gpu=False if device == 'cpu' else device)
+    init_time = time.time() - init_start
+    print(f"✅ EasyOCR initialized in {init_time:.2f} seconds")
+    return reader
+
 def apply_current_preprocessing(img):
     """
-    Applies the currently used preprocessing pipeline
+    Applies the currently used preprocessing pipeline to a BGR or grayscale image
     """
     if not LIBS_AVAILABLE:
         print("⚠️ libs.utils.image_utils not available - using simple preprocessing")
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img.copy()
         return gray
     
-    # The current pipeline from the system
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img.copy()
+    # The current pipeline from the system; a grayscale input is used as is (unsharp_mask doesn't modify it)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
     
     # Unsharp masking for better sharpness
     gray = unsharp_mask(gray)
@@ -60,31 +164,74 @@ def apply_current_preprocessing(img):
     
     return gray
 
-def test_tesseract_ocr(img, method_name, save_debug=False):
+def _text_line_heights(gray):
+    """
+    Returns the heights of the text lines Tesseract finds in a grayscale image, via the shared
+    tesserocr API if available (layout analysis only, no recognition)
+    """
+    api = _get_tesseract_api() if TESSEROCR_AVAILABLE else None
+    if api is None:
+        data = pytesseract.image_to_data(gray, lang='deu+eng', config=TESSERACT_CONFIG, output_type=pytesseract.Output.DICT)
+        return [h for h, conf, text in zip(data['height'], data['conf'], data['text'])
+                if float(conf) > 0 and text.strip()]
+    
+    gray = np.ascontiguousarray(gray)
+    api.SetImageBytes(gray.tobytes(), gray.shape[1], gray.shape[0], 1, gray.strides[0])
+    return [box['h'] for _, box, _, _ in api.GetComponentImages(RIL.TEXTLINE, True)]
+
+def estimate_line_height(img, thumbnail_scale=0.25):
+    """
+    Estimates the text line height (in pixels) of an image from a Tesseract layout pass on a thumbnail.
+    Returns None if no text is found or Tesseract fails.
+    """
+    thumbnail = cv2.resize(img, None, fx=thumbnail_scale, fy=thumbnail_scale, interpolation=cv2.INTER_AREA)
+    if thumbnail.ndim == 3:
+        thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+    try:
+        heights = _text_line_heights(thumbnail)
+    except Exception as e:
+        print(f"⚠️ Line height estimation failed: {e}")
+        return None
+    if not heights:
+        return None
+    return float(np.median(heights)) / thumbnail_scale
+
+def resize_to_line_height(img, target_line_height=TARGET_LINE_HEIGHT):
+    """
+    Resizes the image so its text lines are about target_line_height pixels high, where Tesseract
+    works best; larger text only costs time. Returns the image unchanged if no text is found.
+    """
+    line_height = estimate_line_height(img)
+    if line_height is None:
+        return img, 1.0
+    
+    scale = target_line_height / line_height
+    if abs(scale - 1.0) < 0.1:
+        return img, 1.0
+    interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+    return cv2.resize(img, None, fx=scale, fy=scale, interpolation=interpolation), scale
+
+def test_tesseract_ocr(img, method_name, save_debug=False, log=print, debug_prefix=''):
     """
     Tests Tesseract OCR on an image
     """
-    print(f"\n--- Tesseract OCR ({method_name}) ---")
+    log(f"\n--- Tesseract OCR ({method_name}) ---")
     
     start_time = time.time()
     try:
         # OCR with German and English
-        text = pytesseract.image_to_string(
-            img, 
-            lang='deu+eng', 
-            config='--psm 6'
-        ).strip()
+        text = _tesseract_image_to_string(img).strip()
         
         processing_time = time.time() - start_time
         
-        print(f"✅ Processing time: {processing_time:.2f} seconds")
-        print(f"📝 Text length: {len(text)} characters")
-        print(f"📖 Detected text: '{text}'")
+        log(f"✅ Processing time: {processing_time:.2f} seconds")
+        log(f"📝 Text length: {len(text)} characters")
+        log(f"📖 Detected text: '{text}'")
         
         if save_debug:
-            debug_filename = f"debug_tesseract_{method_name.lower().replace(' ', '_')}.jpg"
-            cv2.imwrite(debug_filename, img)
-            print(f"💾 Debug image saved: {debug_filename}")
+            debug_filename = f"debug_{debug_prefix}tesseract_{method_name.lower().replace(' ', '_')}.png"
+            save_debug_image(debug_filename, img)
+            log(f"💾 Debug image saved: {debug_filename}")
         
         return {
             'text': text,
@@ -94,7 +241,7 @@ def test_tesseract_ocr(img, method_name, save_debug=False):
         }
         
     except Exception as e:
-        print(f"❌ Tesseract OCR failed: {e}")
+        log(f"❌ Tesseract OCR failed: {e}")
         return {
             'text': '',
             'length': 0,
@@ -103,133 +250,217 @@ def test_tesseract_ocr(img, method_name, save_debug=False):
             'error': str(e)
         }
 
-def test_easyocr(img, method_name, reader=None, save_debug=False):
+def _easyocr_unavailable(method_name, log=print):
+    log(f"\n--- EasyOCR ({method_name}) ---")
+    log("❌ EasyOCR not available - installation required")
+    return {
+        'text': '',
+        'length': 0,
+        'time': 0,
+        'method': f'EasyOCR ({method_name})',
+        'error': 'EasyOCR not installed'
+    }
+
+def _report_easyocr(results, processing_time, img, method_name, reader, save_debug, log=print, debug_prefix=''):
+    """
+    Prints the EasyOCR results for one image and returns them as a result dict
+    """
+    # Extract texts and confidence values
+    texts = [text for _, text, _ in results]
+    confidences = np.fromiter((confidence for _, _, confidence in results), dtype=np.float64, count=len(results))
+    
+    log(f"✅ Processing time: {processing_time:.2f} seconds")
+    log(f"📊 Number of detections: {len(results)}")
+    if results:
+        log('\n'.join(f"  {i+1}. '{text}' (Confidence: {confidence:.3f})"
+                      for i, (text, confidence) in enumerate(zip(texts, confidences))))
+    
+    # Combine full text
+    full_text = ' '.join(texts)
+    avg_confidence = float(confidences.mean()) if confidences.size else 0
+    
+    log(f"📝 Text length: {len(full_text)} characters")
+    log(f"📈 Average confidence: {avg_confidence:.3f}")
+    log(f"📖 Full text: '{full_text}'")
+    
+    if save_debug:
+        debug_filename = f"debug_{debug_prefix}easyocr_{method_name.lower().replace(' ', '_')}.png"
+        save_debug_image(debug_filename, img)
+        log(f"💾 Debug image saved: {debug_filename}")
+    
+    return {
+        'text': full_text,
+        'length': len(full_text),
+        'time': processing_time,
+        'method': f'EasyOCR ({method_name})',
+        'confidence': avg_confidence,
+        'detections': len(results),
+        'reader': reader  # Return reader for reuse
+    }
+
+def _easyocr_failed(method_name, e, reader, log=print):
+    log(f"❌ EasyOCR failed: {e}")
+    return {
+        'text': '',
+        'length': 0,
+        'time': 0,
+        'method': f'EasyOCR ({method_name})',
+        'error': str(e),
+        'reader': reader
+    }
+
+def test_easyocr(img, method_name, reader=None, save_debug=False, device='cpu', log=print, debug_prefix=''):
     """
     Tests EasyOCR on an image
     """
     if not EASYOCR_AVAILABLE:
-        print(f"\n--- EasyOCR ({method_name}) ---")
-        print("❌ EasyOCR not available - installation required")
-        return {
-            'text': '',
-            'length': 0,
-            'time': 0,
-            'method': f'EasyOCR ({method_name})',
-            'error': 'EasyOCR not installed'
-        }
-    
-    print(f"\n--- EasyOCR ({method_name}) ---")
+        return _easyocr_unavailable(method_name, log)
     
-    # Create reader if not provided
-    if reader is None:
-        print("🔄 Initializing EasyOCR Reader...")
-        init_start = time.time()
-        reader = easyocr.Reader(['de', 'en'], gpu=False)  # GPU=False for better compatibility
-        init_time = time.time() - init_start
-        print(f"✅ EasyOCR initialized in {init_time:.2f} seconds")
+    log(f"\n--- EasyOCR ({method_name}) ---")
     
-    start_time = time.time()
     try:
+        # Use the shared reader if none is provided
+        reader = reader or _get_reader(('de', 'en'), device)
+        
+        start_time = time.time()
         # EasyOCR recognition
         results = reader.readtext(img)
         processing_time = time.time() - start_time
+        return _report_easyocr(results, processing_time, img, method_name, reader, save_debug, log, debug_prefix)
         
-        # Extract texts and confidence values
-        texts = []
-        confidences = []
-        
-        print(f"✅ Processing time: {processing_time:.2f} seconds")
-        print(f"📊 Number of detections: {len(results)}")
-        
-        for i, (bbox, text, confidence) in enumerate(results):
-            texts.append(text)
-            confidences.append(confidence)
-            print(f"  {i+1}. '{text}' (Confidence: {confidence:.3f})")
-        
-        # Combine full text
-        full_text = ' '.join(texts)
-        avg_confidence = np.mean(confidences) if confidences else 0
-        
-        print(f"📝 Text length: {len(full_text)} characters")
-        print(f"📈 Average confidence: {avg_confidence:.3f}")
-        print(f"📖 Full text: '{full_text}'")
-        
-        if save_debug:
-            debug_filename = f"debug_easyocr_{method_name.lower().replace(' ', '_')}.jpg"
-            cv2.imwrite(debug_filename, img)
-            print(f"💾 Debug image saved: {debug_filename}")
-        
-        return {
-            'text': full_text,
-            'length': len(full_text),
-            'time': processing_time,
-            'method': f'EasyOCR ({method_name})',
-            'confidence': avg_confidence,
-            'detections': len(results),
-            'reader': reader  # Return reader for reuse
-        }
+    except Exception as e:
+        return _easyocr_failed(method_name, e, reader, log)
+
+def test_easyocr_batched(variants, reader=None, save_debug=False, device='cpu', log=print, debug_prefix=''):
+    """
+    Tests EasyOCR on several variants of the same image (a list of (img, method_name)) in a single
+    batched call: detection and recognition run once over all variants instead of once per variant.
+    The variants must have the same size. Each result reports an equal share of the total time.
+    """
+    if not EASYOCR_AVAILABLE:
+        return [_easyocr_unavailable(method_name, log) for _, method_name in variants]
+    
+    log(f"\n--- EasyOCR (batch of {len(variants)} variants) ---")
+    
+    try:
+        # Use the shared reader if none is provided
+        reader = reader or _get_reader(('de', 'en'), device)
         
+        start_time = time.time()
+        batch_results = reader.readtext_batched([img for img, _ in variants], batch_size=len(variants))
+        processing_time = time.time() - start_time
+        log(f"✅ Total processing time: {processing_time:.2f} seconds")
     except Exception as e:
-        print(f"❌ EasyOCR failed: {e}")
-        return {
-            'text': '',
-            'length': 0,
-            'time': 0,
-            'method': f'EasyOCR ({method_name})',
-            'error': str(e),
-            'reader': reader
-        }
+        return [_easyocr_failed(method_name, e, reader, log) for _, method_name in variants]
+    
+    results = []
+    for (img, method_name), variant_results in zip(variants, batch_results):
+        log(f"\n--- EasyOCR ({method_name}, batched) ---")
+        results.append(_report_easyocr(variant_results, processing_time / len(variants), img, method_name, reader, save_debug, log, debug_prefix))
+    return results
+
+def _run_tesseract_tests(variants, save_debug=False, log=print, debug_prefix=''):
+    """
+    Runs Tesseract on each variant (a list of (img, method_name)), one after the other
+    """
+    return [test_tesseract_ocr(img, method_name, save_debug=save_debug, log=log, debug_prefix=debug_prefix) for img, method_name in variants]
 
-def analyze_image(img_path):
+def _run_easyocr_tests(variants, batch=True, device='cpu', save_debug=False, log=print, debug_prefix=''):
+    """
+    Runs EasyOCR on the variants (a list of (img, method_name)), in one batch or one after the other
+    """
+    if batch:
+        return test_easyocr_batched(variants, save_debug=save_debug, device=device, log=log, debug_prefix=debug_prefix)
+    
+    results = []
+    easyocr_reader = None
+    for variant_img, method_name in variants:
+        result = test_easyocr(variant_img, method_name, reader=easyocr_reader, save_debug=save_debug, device=device, log=log,
+                             debug_prefix=debug_prefix)
+        results.append(result)
+        if 'reader' in result:
+            easyocr_reader = result['reader']
+    return results
+
+def read_image_bytes(img_path):
+    """
+    Reads the image file in one bulk read, as a buffer for cv2.imdecode
+    """
+    with open(img_path, 'rb') as f:
+        return np.frombuffer(f.read(), np.uint8)
+
+def analyze_image(img_path, device='cpu', batch_easyocr=True, full=False, parallel=True, img_bytes=None,
+                  resize=False, save_debug=False):
     """
     Performs comprehensive OCR analysis
     """
     print(f"🔍 Analyzing image: {img_path}")
     
-    # Load image
-    img = cv2.imread(str(img_path))
+    # Load image; decoding from one bulk read is faster than cv2.imread's small reads on a cold cache
+    if img_bytes is None:
+        img_bytes = read_image_bytes(img_path)
+    img = cv2.imdecode(img_bytes, cv2.IMREAD_COLOR) if img_bytes.size else None
     if img is None:
         print(f"❌ Error: Image {img_path} could not be loaded")
         return
     
     print(f"📏 Image size: {img.shape}")
     
+    # Optionally resize once, so all OCR tests get the image at the line height Tesseract works best with
+    if resize:
+        img, scale = resize_to_line_height(img)
+        if scale != 1.0:
+            print(f"📐 Resized by {scale:.2f} to a line height of about {TARGET_LINE_HEIGHT} px: {img.shape}")
+    
     # Grayscale version for analysis
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    mean_val = np.mean(gray)
-    std_val = np.std(gray)
+    mean, std = cv2.meanStdDev(gray)
+    mean_val, std_val = mean.item(), std.item()
     print(f"📊 Image statistics: Mean={mean_val:.1f}, Standard deviation={std_val:.1f}")
     
     # Apply preprocessing
     print("\n🔄 Applying preprocessing...")
-    preprocessed = apply_current_preprocessing(img)
+    preprocessed = apply_current_preprocessing(gray)
     
     results = []
-    easyocr_reader = None
     
-    # Test 1: Tesseract without preprocessing
-    result = test_tesseract_ocr(gray, "without preprocessing", save_debug=True)
-    results.append(result)
+    # Tests 1-2: Tesseract without and with preprocessing
+    tesseract_variants = [
+        (gray, "without preprocessing"),
+        (preprocessed, "with preprocessing")
+    ]
     
-    # Test 2: Tesseract with preprocessing
-    result = test_tesseract_ocr(preprocessed, "with preprocessing", save_debug=True)
-    results.append(result)
+    # Tests 3-5: EasyOCR without preprocessing (on original RGB and on grayscale) and with preprocessing.
+    # EasyOCR recognizes text on a grayscale conversion of its input anyway, so the RGB variant is
+    # mostly redundant with the grayscale one and only run with --full.
+    easyocr_variants = [
+        (gray, "without preprocessing (Gray)"),
+        (preprocessed, "with preprocessing")
+    ]
+    if full:
+        easyocr_variants.insert(0, (img, "without preprocessing (RGB)"))
     
-    # Test 3: EasyOCR without preprocessing (on original RGB)
-    result = test_easyocr(img, "without preprocessing (RGB)", save_debug=True)
-    results.append(result)
-    if 'reader' in result:
-        easyocr_reader = result['reader']
+    # Debug images are named after the image, so analyzing several images doesn't overwrite them
+    debug_prefix = f"{Path(img_path).stem}_"
     
-    # Test 4: EasyOCR without preprocessing (on grayscale)
-    result = test_easyocr(gray, "without preprocessing (Gray)", reader=easyocr_reader, save_debug=True)
-    results.append(result)
-    if 'reader' in result:
-        easyocr_reader = result['reader']
-    
-    # Test 5: EasyOCR with preprocessing
-    result = test_easyocr(preprocessed, "with preprocessing", reader=easyocr_reader, save_debug=True)
-    results.append(result)
+    # Tesseract and EasyOCR both release the GIL while recognizing, so the two backends run at the
+    # same time (each one's tests still one after the other). Each backend writes its output to a
+    # buffer, which is printed in order once it is done.
+    jobs = [
+        (functools.partial(_run_tesseract_tests, save_debug=save_debug, debug_prefix=debug_prefix), tesseract_variants),
+        (functools.partial(_run_easyocr_tests, batch=batch_easyocr, device=device, save_debug=save_debug,
+                           debug_prefix=debug_prefix), easyocr_variants)
+    ]
+    buffers = [io.StringIO() for _ in jobs]
+    with ThreadPoolExecutor(max_workers=len(jobs) if parallel else 1) as executor:
+        futures = [
+            executor.submit(run_tests, variants, log=functools.partial(print, file=buffer))
+            for (run_tests, variants), buffer in zip(jobs, buffers)
+        ]
+        for future, buffer in zip(futures, buffers):
+            job_results = future.result()
+            sys.stdout.write(buffer.getvalue())
+            results.extend(job_results)
     
     # Summarize results
     print("\n" + "="*80)
@@ -264,34 +495,130 @@ def analyze_image(img_path):
     else:
         print("\n❌ No successful OCR results")
     
-    print("\n💾 Debug images have been saved for manual inspection")
+    if save_debug:
+        print("\n💾 Debug images have been saved for manual inspection")
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+
+def collect_image_paths(paths):
+    """
+    Returns the image paths, with each directory replaced by the images in it (sorted)
+    """
+    img_paths = []
+    for path in paths:
+        if path.is_dir():
+            img_paths.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS))
+        else:
+            img_paths.append(path)
+    return img_paths
+
+def _warm_worker(device, threads):
+    """
+    Pool initializer: loads the EasyOCR Reader and the Tesseract engine once per worker process.
+    A failure is reported here and leaves the reader or engine unloaded, so each test reports its
+    error as in the serial path (an initializer that raises would make the pool restart the worker forever).
+    """
+    cv2.setNumThreads(threads)
+    if EASYOCR_AVAILABLE:
+        try:
+            _get_reader(('de', 'en'), device)
+        except Exception as e:
+            print(f"⚠️ Could not load the EasyOCR Reader in worker {os.getpid()}: {e}")
+    if TESSEROCR_AVAILABLE:
+        try:
+            _get_tesseract_api()
+        except Exception as e:
+            print(f"⚠️ Could not load the Tesseract engine in worker {os.getpid()}: {e}")
+
+def _analyze_image_in_worker(task):
+    """
+    Pool task: analyzes one image and returns its output, so output of different images doesn't interleave
+    """
+    img_path, kwargs = task
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        analyze_image(img_path, **kwargs)
+        wait_for_debug_images()
+    return output.getvalue()
 
 def main():
     parser = argparse.ArgumentParser(description='OCR Comparison Test: EasyOCR vs Tesseract')
-    parser.add_argument('image_path', help='Path to the image to analyze')
+    parser.add_argument('image_paths', nargs='+', help='Path(s) to the image(s) or directories of images to analyze')
     parser.add_argument('--no-libs', action='store_true', help='Without libs.utils.image_utils (for minimal preprocessing)')
+    parser.add_argument('--device', choices=['auto', 'cpu', 'cuda', 'mps'], default='auto',
+                        help='Device for EasyOCR (default: auto, i.e. CUDA or MPS if available)')
+    parser.add_argument('--full', action='store_true',
+                        help='Also run EasyOCR on the original RGB image (default: grayscale and preprocessed only)')
+    parser.add_argument('--debug', action='store_true',
+                        help='Save the image of each OCR test as debug_<image>_*.png')
+    parser.add_argument('--resize', action='store_true',
+                        help=f'Resize each image to a text line height of about {TARGET_LINE_HEIGHT} px before OCR (default: original resolution)')
+    parser.add_argument('--serial', action='store_true',
+                        help='Run Tesseract and EasyOCR one after the other, for timings without contention (default: at the same time)')
+    parser.add_argument('--sequential-easyocr', action='store_true',
+                        help='Run EasyOCR on each variant separately, for per-variant timings (default: one batched call)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of worker processes for many images, each with its own EasyOCR Reader and Tesseract engine (default: 1)')
     
     args = parser.parse_args()
     
-    # Validate path
-    img_path = Path(args.image_path)
-    if not img_path.exists():
-        print(f"❌ Error: Image {img_path} does not exist")
+    # Validate paths
+    paths = [Path(image_path) for image_path in args.image_paths]
+    for path in paths:
+        if not path.exists():
+            print(f"❌ Error: Image {path} does not exist")
+            return 1
+    img_paths = collect_image_paths(paths)
+    if not img_paths:
+        print("❌ Error: No images found")
         return 1
     
     # Check availability
     print("🔧 Checking availability...")
-    print(f"✅ Tesseract: Available")
+    print(f"✅ Tesseract: Available ({'tesserocr' if TESSEROCR_AVAILABLE else 'pytesseract'})")
     print(f"{'✅' if EASYOCR_AVAILABLE else '❌'} EasyOCR: {'Available' if EASYOCR_AVAILABLE else 'Not available'}")
     print(f"{'✅' if LIBS_AVAILABLE else '❌'} libs.utils: {'Available' if LIBS_AVAILABLE else 'Not available'}")
+    parallel_framework = opencv_parallel_framework()
+    if parallel_framework:
+        print(f"✅ OpenCV: {CPU_COUNT} threads ({parallel_framework})")
+    else:
+        print("⚠️ OpenCV: built without a parallel framework - preprocessing runs on one core")
     
     if not EASYOCR_AVAILABLE:
         print("\n⚠️ EasyOCR not available. Install with:")
         print("   pip install easyocr")
         print("   Running test with Tesseract only...\n")
     
-    # Perform analysis
-    analyze_image(img_path)
+    device = resolve_device(args.device) if EASYOCR_AVAILABLE else 'cpu'
+    analyze_kwargs = dict(device=device, batch_easyocr=not args.sequential_easyocr, full=args.full,
+                          parallel=not args.serial, resize=args.resize, save_debug=args.debug)
+    
+    # With several workers, each worker process loads the EasyOCR Reader and Tesseract engine once
+    # and analyzes its share of the images; output is printed per image, in order
+    workers = min(args.workers, len(img_paths))
+    if workers > 1:
+        # Split the cores between the workers; spawned workers inherit OMP_NUM_THREADS
+        threads = max(1, CPU_COUNT // workers)
+        os.environ['OMP_NUM_THREADS'] = str(threads)
+        pool = multiprocessing.get_context('spawn').Pool(workers, initializer=_warm_worker, initargs=(device, threads))
+        try:
+            tasks = [(img_path, analyze_kwargs) for img_path in img_paths]
+            for output in pool.imap(_analyze_image_in_worker, tasks):
+                sys.stdout.write(output)
+        finally:
+            pool.close()
+            pool.join()
+        return 0
+    
+    # Otherwise all images are analyzed in this process, so the EasyOCR Reader is only loaded once
+    # The next image is read in the background while the current one is analyzed
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        next_bytes = prefetcher.submit(read_image_bytes, img_paths[0])
+        for i, img_path in enumerate(img_paths):
+            img_bytes = next_bytes.result()
+            if i + 1 < len(img_paths):
+                next_bytes = prefetcher.submit(read_image_bytes, img_paths[i + 1])
+            analyze_image(img_path, img_bytes=img_bytes, **analyze_kwargs)
     
     return 0
 
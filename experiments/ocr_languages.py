@@ -7,8 +7,16 @@ This script compares OCR results with and without language support.
 import os
 import sys
 import cv2
+import numpy as np
 import pytesseract
 
+# Optional: tesserocr keeps Tesseract loaded in-process instead of starting it for every call
+try:
+    from tesserocr import PyTessBaseAPI, OEM
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
 # Add the project root directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
@@ -33,53 +41,73 @@ test_images.sort()  # Sort to ensure consistent order
 # Limit to first 5 images to avoid too much output
 #test_images = test_images[:5]
 
-for img_path in test_images:
-    if os.path.exists(img_path):
-        print(f"\n{'=' * 80}")
-        print(f"TESTING: {os.path.basename(img_path)}")
-        print(f"{'=' * 80}")
-        
-        # Display the image filename and path
-        print(f"Image path: {img_path}")
-        
-        # Load the image
-        img = cv2.imread(img_path)
-        
-        # Define test configurations
-        test_configs = [
-            ("Default (English only)", None, "--psm 6"),
-            ("German only", "deu", "--psm 6"),
-            ("German + English", "deu+eng", "--psm 6"),
-            (f"Config settings ({config.OCR_LANGUAGES})", config.OCR_LANGUAGES, f"--psm {config.OCR_PSM_MODE}")
-        ]
-        
-        # Run tests for each configuration
-        for desc, lang, psm_config in test_configs:
-            print(f"\n{'-' * 40}")
-            print(f"Configuration: {desc}")
-            print(f"{'-' * 40}")
+# Define test configurations
+test_configs = [
+    ("Default (English only)", None, 6),
+    ("German only", "deu", 6),
+    ("German + English", "deu+eng", 6),
+    (f"Config settings ({config.OCR_LANGUAGES})", config.OCR_LANGUAGES, config.OCR_PSM_MODE)
+]
+
+# One engine per configuration, reused for all images; all use the LSTM engine only (--oem 1),
+# which skips loading the legacy engine's data
+# (a configuration whose engine can't be created, e.g. missing language data, uses pytesseract)
+engines = {}
+if TESSEROCR_AVAILABLE:
+    for desc, lang, psm in test_configs:
+        try:
+            engines[desc] = PyTessBaseAPI(lang=lang or 'eng', psm=psm, oem=OEM.LSTM_ONLY)
+        except RuntimeError as e:
+            print(f"Could not create Tesseract engine for '{desc}', using pytesseract: {e}")
+
+try:
+    for img_path in test_images:
+        if os.path.exists(img_path):
+            print(f"\n{'=' * 80}")
+            print(f"TESTING: {os.path.basename(img_path)}")
+            print(f"{'=' * 80}")
             
-            try:
-                # Perform OCR
-                text = pytesseract.image_to_string(img, lang=lang, config=psm_config)
-                
-                # Clean up text for display (remove extra whitespace)
-                text = ' '.join(text.split())
+            # Display the image filename and path
+            print(f"Image path: {img_path}")
+            
+            # Load the image
+            img = cv2.imread(img_path)
+            
+            # Run tests for each configuration
+            for desc, lang, psm in test_configs:
+                print(f"\n{'-' * 40}")
+                print(f"Configuration: {desc}")
+                print(f"{'-' * 40}")
                 
-                # Display results
-                if text.strip():
-                    print(f"Result: {text[:150]}..." if len(text) > 150 else f"Result: {text}")
+                try:
+                    # Perform OCR
+                    if desc in engines:
+                        rgb = np.ascontiguousarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+                        engines[desc].SetImageBytes(rgb.tobytes(), rgb.shape[1], rgb.shape[0], 3, rgb.strides[0])
+                        text = engines[desc].GetUTF8Text()
+                    else:
+                        text = pytesseract.image_to_string(img, lang=lang, config=f"--oem 1 --psm {psm}")
+                    
+                    # Clean up text for display (remove extra whitespace)
+                    text = ' '.join(text.split())
                     
-                    # Count special characters (umlauts, etc.)
-                    special_chars = sum(1 for c in text if c in 'äöüÄÖÜß')
-                    if special_chars > 0:
-                        print(f"Special characters detected: {special_chars} (äöüÄÖÜß)")
-                else:
-                    print("No text detected")
-            except Exception as e:
-                print(f"Error: {e}")
-    else:
-        print(f"Image not found: {img_path}")
+                    # Display results
+                    if text.strip():
+                        print(f"Result: {text[:150]}..." if len(text) > 150 else f"Result: {text}")
+                        
+                        # Count special characters (umlauts, etc.)
+                        special_chars = sum(map(text.count, 'äöüÄÖÜß'))
+                        if special_chars > 0:
+                            print(f"Special characters detected: {special_chars} (äöüÄÖÜß)")
+                    else:
+                        print("No text detected")
+                except Exception as e:
+                    print(f"Error: {e}")
+        else:
+            print(f"Image not found: {img_path}")
+finally:
+    for engine in engines.values():
+        engine.End()
 
 # Add a summary section
 print("\n" + "=" * 80)
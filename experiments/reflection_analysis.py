@@ -13,14 +13,23 @@ import cv2
 import numpy as np
 import time
 import argparse
+import functools
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import matplotlib.pyplot as plt
 
 # Add the project root directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 # Import OCR libraries
 import pytesseract
+try:
+    # Binds libtesseract directly, without starting a tesseract process per image
+    from tesserocr import PyTessBaseAPI, PSM
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
 try:
     import easyocr
     EASYOCR_AVAILABLE = True
@@ -34,34 +43,31 @@ try:
 except ImportError:
     LIBS_AVAILABLE = False
 
-def detect_horizontal_reflections(img):
+def detect_horizontal_reflections(gray):
     """
-    Detects horizontal white reflection lines
+    Detects horizontal white reflection lines in a grayscale image
     """
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img.copy()
-    
     # Find very bright horizontal structures
-    horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (img.shape[1]//3, 1))
+    horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (gray.shape[1]//3, 1))
     tophat = cv2.morphologyEx(gray, cv2.MORPH_TOPHAT, horizontal_kernel)
     
     # Threshold for reflections
     _, reflection_mask = cv2.threshold(tophat, 20, 255, cv2.THRESH_BINARY)
     
     # Statistics about reflection lines
-    reflection_pixels = np.sum(reflection_mask == 255)
-    total_pixels = reflection_mask.shape[0] * reflection_mask.shape[1]
-    reflection_percentage = (reflection_pixels / total_pixels) * 100
+    reflection_pixels = cv2.countNonZero(reflection_mask)  # the mask is 0 or 255
+    reflection_percentage = (reflection_pixels / reflection_mask.size) * 100
     
     return reflection_mask, reflection_percentage
 
-def remove_reflections_method1(img):
+def remove_reflections_method1(gray, reflection_mask=None):
     """
-    Method 1: Inpainting - Replace reflection lines with interpolation
+    Method 1: Inpainting - Replace reflection lines with interpolation.
+    Uses the given reflection mask (from detect_horizontal_reflections) or detects it.
     """
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img.copy()
-    
     # Detect reflection lines
-    reflection_mask, _ = detect_horizontal_reflections(img)
+    if reflection_mask is None:
+        reflection_mask, _ = detect_horizontal_reflections(gray)
     
     # Expand mask slightly for better inpainting
     kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 3))
@@ -72,66 +78,75 @@ def remove_reflections_method1(img):
     
     return result
 
-def remove_reflections_method2(img):
+def remove_reflections_method2(gray):
     """
     Method 2: Morphological Opening - Removes thin bright lines
     """
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img.copy()
-    
     # Morphological opening to remove thin bright lines
     kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 3))
     opened = cv2.morphologyEx(gray, cv2.MORPH_OPEN, kernel)
     
     return opened
 
-def remove_reflections_method3(img):
+# Darkens a pixel value by 30% (same rounding as multiplying by 0.7 in float32 and truncating)
+_DAMPEN_LUT = (np.arange(256, dtype=np.float32) * np.float32(0.7)).astype(np.uint8)
+
+def remove_reflections_method3(gray):
     """
     Method 3: Adaptive threshold dampening
     """
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img.copy()
-    
     # Find local maxima (potential reflections)
     blurred = cv2.GaussianBlur(gray, (5, 5), 0)
     
-    # Dampen areas that are much brighter than their surroundings
-    diff = gray.astype(np.float32) - blurred.astype(np.float32)
+    # Dampen areas that are much brighter than their surroundings; the saturating uint8
+    # subtraction is 0 where gray is darker, which is below the threshold either way
+    mask = cv2.subtract(gray, blurred) > 30
     
     # Only dampen very bright areas
-    mask = diff > 30
-    result = gray.copy().astype(np.float32)
-    result[mask] = result[mask] * 0.7  # Darken reflections by 30%
+    result = gray.copy()
+    result[mask] = _DAMPEN_LUT[result[mask]]  # Darken reflections by 30%
     
-    return result.astype(np.uint8)
+    return result
 
-def apply_current_preprocessing(img):
+def apply_current_preprocessing(gray):
     """
-    Current preprocessing pipeline (reduced)
+    Current preprocessing pipeline (reduced), on a grayscale image
     """
     if not LIBS_AVAILABLE:
-        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img.copy()
+        return gray.copy()
     
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img.copy()
     return unsharp_mask(gray)
 
-def test_ocr_method(img, method_name, save_debug=False):
+def _image_to_string(img, api=None):
     """
-    Tests OCR on a processed image
+    Runs Tesseract (deu+eng, --psm 6) on a grayscale image, via the tesserocr API if given
     """
-    print(f"\n--- {method_name} ---")
-    
-    start_time = time.time()
-    try:
-        text = pytesseract.image_to_string(
+    if api is None:
+        return pytesseract.image_to_string(
             img, 
             lang='deu+eng', 
             config='--psm 6'
-        ).strip()
+        )
+    
+    img = np.ascontiguousarray(img)
+    api.SetImageBytes(img.tobytes(), img.shape[1], img.shape[0], 1, img.strides[0])
+    return api.GetUTF8Text()
+
+def test_ocr_method(img, method_name, save_debug=False, api=None, log=print):
+    """
+    Tests OCR on a processed image, with the tesserocr API if given (otherwise with pytesseract)
+    """
+    log(f"\n--- {method_name} ---")
+    
+    start_time = time.time()
+    try:
+        text = _image_to_string(img, api).strip()
         
         processing_time = time.time() - start_time
         
-        print(f"✅ Processing time: {processing_time:.2f} seconds")
-        print(f"📝 Text length: {len(text)} characters")
-        print(f"📖 Detected text: '{text}'")
+        log(f"✅ Processing time: {processing_time:.2f} seconds")
+        log(f"📝 Text length: {len(text)} characters")
+        log(f"📖 Detected text: '{text}'")
         
         # Search for known words
         known_words = ['ORHAN', 'PAMUK', 'DIE', 'ROTHAARIGE', 'ROTH']
@@ -142,12 +157,12 @@ def test_ocr_method(img, method_name, save_debug=False):
                 found_words.append(word)
         
         if found_words:
-            print(f"🎯 Detected keywords: {', '.join(found_words)}")
+            log(f"🎯 Detected keywords: {', '.join(found_words)}")
         
         if save_debug:
             debug_filename = f"debug_reflection_{method_name.lower().replace(' ', '_').replace('(', '').replace(')', '')}.jpg"
             cv2.imwrite(debug_filename, img)
-            print(f"💾 Debug image saved: {debug_filename}")
+            log(f"💾 Debug image saved: {debug_filename}")
         
         return {
             'text': text,
@@ -158,7 +173,7 @@ def test_ocr_method(img, method_name, save_debug=False):
         }
         
     except Exception as e:
-        print(f"❌ OCR failed: {e}")
+        log(f"❌ OCR failed: {e}")
         return {
             'text': '',
             'length': 0,
@@ -168,7 +183,49 @@ def test_ocr_method(img, method_name, save_debug=False):
             'keywords': []
         }
 
-def analyze_reflections(img_path):
+def run_ocr_tests(variants, save_debug=False, workers=None):
+    """
+    Runs test_ocr_method on each variant (a list of (img, method_name)) on a thread pool and returns
+    the results in order. Tesseract runs outside the GIL (tesserocr releases it, pytesseract waits for
+    a tesseract process), so threads run the tests in parallel; each thread has its own tesserocr engine.
+    """
+    workers = workers or min(len(variants), os.cpu_count() or 1)
+    
+    # Each thread creates its engine once; all engines are closed after the tests. A thread whose
+    # engine can't be created (e.g. missing language data) runs its tests with pytesseract.
+    thread_state = threading.local()
+    apis = []
+    def create_api():
+        try:
+            thread_state.api = PyTessBaseAPI(lang='deu+eng', psm=PSM.SINGLE_BLOCK)
+        except RuntimeError as e:
+            print(f"⚠️ Could not create Tesseract engine, using pytesseract: {e}")
+            return
+        apis.append(thread_state.api)
+    
+    def run_test(img, method_name, log):
+        return test_ocr_method(img, method_name, save_debug=save_debug, api=getattr(thread_state, 'api', None), log=log)
+    
+    # Each test writes its output to a buffer, which is printed in order once the test is done
+    buffers = [io.StringIO() for _ in variants]
+    results = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers, initializer=create_api if TESSEROCR_AVAILABLE else None) as executor:
+            futures = [
+                executor.submit(run_test, img, method_name, functools.partial(print, file=buffer))
+                for (img, method_name), buffer in zip(variants, buffers)
+            ]
+            for future, buffer in zip(futures, buffers):
+                result = future.result()
+                sys.stdout.write(buffer.getvalue())
+                results.append(result)
+    finally:
+        for api in apis:
+            api.End()
+    
+    return results
+
+def analyze_reflections(img_path, workers=None):
     """
     Performs comprehensive reflection lines analysis
     """
@@ -182,46 +239,44 @@ def analyze_reflections(img_path):
     
     print(f"📏 Image size: {img.shape}")
     
+    # Grayscale original, converted once; all methods work on it (the color image is only visualized)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    
     # Reflection analysis
     print("\n🔬 Reflection lines analysis...")
-    reflection_mask, reflection_percentage = detect_horizontal_reflections(img)
+    reflection_mask, reflection_percentage = detect_horizontal_reflections(gray)
     print(f"📊 Reflection percentage: {reflection_percentage:.2f}% of image area")
     
     # Save reflection mask
     cv2.imwrite("debug_reflection_mask.jpg", reflection_mask)
     print("💾 Reflection mask saved: debug_reflection_mask.jpg")
     
-    # Grayscale original
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    
-    results = []
-    
-    # Test 1: Original without preprocessing
-    result = test_ocr_method(gray, "Original (without preprocessing)", save_debug=True)
-    results.append(result)
+    # Test 1 uses the grayscale original without preprocessing
     
     # Test 2: Current preprocessing (only Unsharp Mask)
-    current_processed = apply_current_preprocessing(img)
-    result = test_ocr_method(current_processed, "Current (Unsharp Mask)", save_debug=True)
-    results.append(result)
+    current_processed = apply_current_preprocessing(gray)
     
     # Test 3: Reflection removal Method 1 (Inpainting)
-    method1 = remove_reflections_method1(img)
+    method1 = remove_reflections_method1(gray, reflection_mask)
     method1_sharpened = unsharp_mask(method1) if LIBS_AVAILABLE else method1
-    result = test_ocr_method(method1_sharpened, "Inpainting + Unsharp", save_debug=True)
-    results.append(result)
     
     # Test 4: Reflection removal Method 2 (Morphological)
-    method2 = remove_reflections_method2(img)
+    method2 = remove_reflections_method2(gray)
     method2_sharpened = unsharp_mask(method2) if LIBS_AVAILABLE else method2
-    result = test_ocr_method(method2_sharpened, "Morphological + Unsharp", save_debug=True)
-    results.append(result)
     
     # Test 5: Reflection removal Method 3 (Adaptive dampening)
-    method3 = remove_reflections_method3(img)
+    method3 = remove_reflections_method3(gray)
     method3_sharpened = unsharp_mask(method3) if LIBS_AVAILABLE else method3
-    result = test_ocr_method(method3_sharpened, "Adaptive Dampening + Unsharp", save_debug=True)
-    results.append(result)
+    
+    # The tests are independent, so they run in parallel
+    variants = [
+        (gray, "Original (without preprocessing)"),
+        (current_processed, "Current (Unsharp Mask)"),
+        (method1_sharpened, "Inpainting + Unsharp"),
+        (method2_sharpened, "Morphological + Unsharp"),
+        (method3_sharpened, "Adaptive Dampening + Unsharp")
+    ]
+    results = run_ocr_tests(variants, save_debug=True, workers=workers)
     
     # Summarize results
     print("\n" + "="*80)
@@ -249,49 +304,41 @@ def analyze_reflections(img_path):
     print(f"📝 Full text: '{best_for_keywords['text']}'")
     
     # Visualisierung erstellen
-    create_visualization(img, reflection_mask, method1, method2, method3)
+    create_visualization(img, gray, reflection_mask, method1, method2, method3)
 
-def create_visualization(original, reflection_mask, method1, method2, method3):
+# Width of each tile in the visualization (all images have the same size, so they are scaled alike)
+VISUALIZATION_TILE_WIDTH = 600
+
+def _visualization_tile(img, title, scale):
+    """
+    Scales an image (BGR or grayscale) for the visualization and puts its title in a bar above it
     """
-    Erstellt eine Visualisierung der verschiedenen Methoden
+    if img.ndim == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    if scale != 1.0:
+        img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    
+    title_bar = np.full((40, img.shape[1], 3), 255, dtype=np.uint8)
+    cv2.putText(title_bar, title, (10, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2, cv2.LINE_AA)
+    return np.vstack([title_bar, img])
+
+def create_visualization(original, gray, reflection_mask, method1, method2, method3):
+    """
+    Erstellt eine Visualisierung der verschiedenen Methoden (2x3 Kacheln, mit OpenCV)
     """
     try:
-        fig, axes = plt.subplots(2, 3, figsize=(15, 10))
-        
-        # Original
-        axes[0,0].imshow(cv2.cvtColor(original, cv2.COLOR_BGR2RGB))
-        axes[0,0].set_title("Original")
-        axes[0,0].axis('off')
-        
-        # Reflexionsmaske
-        axes[0,1].imshow(reflection_mask, cmap='gray')
-        axes[0,1].set_title("Erkannte Reflexionslinien")
-        axes[0,1].axis('off')
-        
-        # Graustufen Original
-        gray = cv2.cvtColor(original, cv2.COLOR_BGR2GRAY)
-        axes[0,2].imshow(gray, cmap='gray')
-        axes[0,2].set_title("Original Graustufen")
-        axes[0,2].axis('off')
-        
-        # Methode 1: Inpainting
-        axes[1,0].imshow(method1, cmap='gray')
-        axes[1,0].set_title("Inpainting")
-        axes[1,0].axis('off')
-        
-        # Methode 2: Morphologisch
-        axes[1,1].imshow(method2, cmap='gray')
-        axes[1,1].set_title("Morphological Opening")
-        axes[1,1].axis('off')
-        
-        # Method 3: Adaptive dampening
-        axes[1,2].imshow(method3, cmap='gray')
-        axes[1,2].set_title("Adaptive Dampening")
-        axes[1,2].axis('off')
+        scale = min(1.0, VISUALIZATION_TILE_WIDTH / original.shape[1])
+        tiles = [
+            _visualization_tile(original, "Original", scale),
+            _visualization_tile(reflection_mask, "Erkannte Reflexionslinien", scale),
+            _visualization_tile(gray, "Original Graustufen", scale),
+            _visualization_tile(method1, "Inpainting", scale),
+            _visualization_tile(method2, "Morphological Opening", scale),
+            _visualization_tile(method3, "Adaptive Dampening", scale)
+        ]
+        mosaic = np.vstack([np.hstack(tiles[:3]), np.hstack(tiles[3:])])
         
-        plt.tight_layout()
-        plt.savefig("reflection_analysis_comparison.png", dpi=300, bbox_inches='tight')
-        plt.close()
+        cv2.imwrite("reflection_analysis_comparison.png", mosaic, [cv2.IMWRITE_PNG_COMPRESSION, 3])
         
         print("\n📊 Visualization saved: reflection_analysis_comparison.png")
         
@@ -301,6 +348,8 @@ def create_visualization(original, reflection_mask, method1, method2, method3):
 def main():
     parser = argparse.ArgumentParser(description='Reflection lines analysis for book cover OCR')
     parser.add_argument('image_path', help='Path to the image to analyze')
+    parser.add_argument('--serial', action='store_true',
+                        help='Run the OCR tests one after the other, for timings without contention (default: in parallel)')
     
     args = parser.parse_args()
     
@@ -312,11 +361,11 @@ def main():
     
     # Check availability
     print("🔧 Checking availability...")
-    print(f"✅ Tesseract: Available")
+    print(f"✅ Tesseract: Available ({'tesserocr' if TESSEROCR_AVAILABLE else 'pytesseract'})")
     print(f"{'✅' if LIBS_AVAILABLE else '❌'} libs.utils: {'Available' if LIBS_AVAILABLE else 'Not available'}")
     
     # Perform analysis
-    analyze_reflections(img_path)
+    analyze_reflections(img_path, workers=1 if args.serial else None)
     
     return 0
 
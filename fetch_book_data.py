@@ -6,7 +6,9 @@ import gzip
 
 import sqlite3
 import requests
+from requests.adapters import HTTPAdapter
 import time 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from langdetect import detect, LangDetectException
 
@@ -21,11 +23,18 @@ SUPPORTED_LANGUAGES = ["de"]
 # Default parameters
 DEFAULT_BOOK_LIMIT = 1000
 DEFAULT_FREQUENCY = 100000
+DEFAULT_WORKERS = 8
+
+# Shared session, so the TLS connections to OpenLibrary are reused across queries
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
 
 def initialize_database():
     """Create the SQLite database and books table if they don't exist."""
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
+    # WAL is stored in the database file; with it, synchronous=NORMAL is still safe
+    cursor.execute("PRAGMA journal_mode=WAL")
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS books (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -49,88 +58,97 @@ def purge_database():
     conn.close()
     print("🗑️ Database purged successfully.")
 
-def fetch_books_from_openlibrary(languages, queries, max_books_per_query=1000):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    lang_map = {'en': 'eng', 'de': 'ger', 'fr': 'fre', 'it': 'ita'}
-
-    for lang in languages:
-
-        lang_code = lang_map.get(lang)
-        if not lang_code:
-            print(f"❌ Language '{lang}' not supported. Skipping it.")
+def _fetch_query(lang_code, query, max_books_per_query):
+    """Fetch the OpenLibrary search results for one query, with retries. Returns the list of books, or None on failure."""
+    url = f"https://openlibrary.org/search.json?q={query}&language={lang_code}&limit={max_books_per_query}&sort=editions"
+
+    retries = 3  # Retry up to 3 times in case of failure
+    for attempt in range(retries):
+        try:
+            response = SESSION.get(url, timeout=120)  # Timeout to prevent infinite waiting
+
+            if response.status_code != 200:
+                print(f"    ❌ HTTP error {response.status_code} for query '{query}' (Attempt {attempt + 1}/{retries})")
+                time.sleep(2 ** attempt)  # Exponential backoff
+                continue  # Retry the request
+
+            try:
+                data = response.json()
+            except json.JSONDecodeError:
+                print(f"    ❌ JSON decoding error for query '{query}' (Attempt {attempt + 1}/{retries})")
+                time.sleep(2 ** attempt)
+                continue
+
+            books = data.get("docs", [])
+            if not isinstance(books, list):
+                print(f"    ⚠️ Unexpected response format for query '{query}'. Skipping...")
+                return None  # No point in retrying, OpenLibrary sent an unexpected format
+
+            return books
+
+        except requests.RequestException as e:
+            print(f"    ❌ Request failed: {e} (Attempt {attempt + 1}/{retries})")
+            time.sleep(2 ** attempt)
+
+    print(f"    ⚠️ Failed to fetch books for query '{query}' after {retries} attempts.")
+    return None
+
+def _store_books(conn, books, lang, lang_code):
+    """Insert the fetched books of one query into the books table in one transaction, skipping duplicates."""
+    rows = []
+    for book in books:
+        if 'language' in book and lang_code not in book['language']:
+            continue  # Skip if language does not match exactly
+
+        title = book.get('title', '').strip()
+        if not title:
             continue
 
-        print(f"📚 Starting fetch for language '{lang}'...")
-        for query in queries.get(lang, []):
-
-            print(f"    Query '{query}'...")
-
-            url = f"https://openlibrary.org/search.json?q={query}&language={lang_code}&limit={max_books_per_query}&sort=editions"
+        authors = ", ".join(book.get('author_name', [])) if 'author_name' in book else "Unknown"
+        year = str(book.get('first_publish_year', 'Unknown'))
+        isbn = book.get('isbn', ['Unknown'])[0]
+        rows.append((title, authors, year, isbn, lang))
 
-            retries = 3  # Retry up to 3 times in case of failure
-            for attempt in range(retries):
-                try:
-                    response = requests.get(url, timeout=120)  # Timeout to prevent infinite waiting
+    with conn:
+        cursor = conn.executemany("""
+            INSERT OR IGNORE INTO books (title, authors, year, isbn, language)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)  # Duplicate entries are ignored
 
-                    if response.status_code != 200:
-                        print(f"    ❌ HTTP error {response.status_code} for query '{query}' (Attempt {attempt + 1}/{retries})")
-                        time.sleep(2 ** attempt)  # Exponential backoff
-                        continue  # Retry the request
+    print(f"        📚 {cursor.rowcount} books inserted...")
 
-                    try:
-                        data = response.json()
-                    except json.JSONDecodeError:
-                        print(f"    ❌ JSON decoding error for query '{query}' (Attempt {attempt + 1}/{retries})")
-                        time.sleep(2 ** attempt)
-                        continue
-
-                    books = data.get("docs", [])
-                    if not isinstance(books, list):
-                        print(f"    ⚠️ Unexpected response format for query '{query}'. Skipping...")
-                        break  # No point in retrying, OpenLibrary sent an unexpected format
-
-                    inserted_count = 0  # Count of inserted books, for progress indication
-
-                    for book in books:
-                        if 'language' in book and lang_code not in book['language']:
-                            continue  # Skip if language does not match exactly
-
-                        title = book.get('title', '').strip()
-                        if not title:
-                            continue
-
-                        authors = ", ".join(book.get('author_name', [])) if 'author_name' in book else "Unknown"
-                        year = str(book.get('first_publish_year', 'Unknown'))
-                        isbn = book.get('isbn', ['Unknown'])[0]
+def fetch_books_from_openlibrary(languages, queries, max_books_per_query=1000, max_workers=DEFAULT_WORKERS):
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA synchronous=NORMAL")
 
-                        try:
-                            cursor.execute("""
-                                INSERT INTO books (title, authors, year, isbn, language)
-                                VALUES (?, ?, ?, ?, ?)
-                            """, (title, authors, year, isbn, lang))
-                            inserted_count += 1
+    lang_map = {'en': 'eng', 'de': 'ger', 'fr': 'fre', 'it': 'ita'}
 
-                            if inserted_count % 100 == 0:
-                                print(f"        📚 {inserted_count} books inserted...")
+    # All queries are sent in parallel over pooled connections; the results are stored
+    # from this thread as they arrive, since the database connection isn't shared
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for lang in languages:
 
-                        except sqlite3.IntegrityError:
-                            continue  # Duplicate entry
+            lang_code = lang_map.get(lang)
+            if not lang_code:
+                print(f"❌ Language '{lang}' not supported. Skipping it.")
+                continue
 
-                    print(f"    ✅ Successfully fetched {len(books)} books for query '{query}'")
-                    break  # Success, exit retry loop
+            print(f"📚 Starting fetch for language '{lang}'...")
+            futures = {}
+            for query in queries.get(lang, []):
+                print(f"    Query '{query}'...")
+                futures[executor.submit(_fetch_query, lang_code, query, max_books_per_query)] = query
 
-                except requests.RequestException as e:
-                    print(f"    ❌ Request failed: {e} (Attempt {attempt + 1}/{retries})")
-                    time.sleep(2 ** attempt)
+            for future in as_completed(futures):
+                books = future.result()
+                if books is None:
+                    continue
 
-            if attempt == retries - 1:
-                print(f"    ⚠️ Failed to fetch books for query '{query}' after {retries} attempts.")
+                _store_books(conn, books, lang, lang_code)
+                print(f"    ✅ Successfully fetched {len(books)} books for query '{futures[future]}'")
 
-        print(f"📚 Finished fetching for language '{lang}'.")
+            print(f"📚 Finished fetching for language '{lang}'.")
 
-    conn.commit()
     conn.close()
 
 def is_correct_language(title, target_lang):
@@ -144,6 +162,7 @@ def main():
     parser = argparse.ArgumentParser(description="Fetch book titles using pragmatic OpenLibrary queries and store in the local database.")
     parser.add_argument("--limit", type=int, default=1000, help="Max number of books per query per language")
     parser.add_argument("--purge", action="store_true", help="Clear database before fetching new books")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of queries sent in parallel")
 
     args = parser.parse_args()
 
@@ -159,7 +178,7 @@ def main():
     if args.purge:
         purge_database()
 
-    fetch_books_from_openlibrary(SUPPORTED_LANGUAGES, queries_by_language, args.limit)
+    fetch_books_from_openlibrary(SUPPORTED_LANGUAGES, queries_by_language, args.limit, args.workers)
 
     print("✅ Finished fetching and storing book data. Run `generate_dictionaries.py` to create dictionary files.")
 
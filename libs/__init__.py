@@ -1,5 +1,6 @@
-from .utils import initialize as initialize_utils
 from .logging import get_logger
 
 def initialize():
+    # Imported on first use: the utils pull in OpenCV, Tesseract and SymSpell, which e.g. the web server doesn't need
+    from .utils import initialize as initialize_utils
     initialize_utils()
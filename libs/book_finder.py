@@ -184,13 +184,9 @@ class BookFinder:
                                 # Retrieve book details
                                 source, book_details = lookup_book_details(best_title)
                                 
-                                # Log the variant and get the variant ID
-                                variant_id = self.current_run.log_bookspine_variant(bookspine_id, variant_path, best_title)
-                                
-                                # Store book lookup results if found
+                                raw_response = None
                                 if book_details:
                                     # Extract the raw response if available
-                                    raw_response = None
                                     if "_raw_response" in book_details:
                                         raw_response = book_details.pop("_raw_response")
                                     
@@ -200,14 +196,15 @@ class BookFinder:
                                         'authors': book_details.get('authors', book_details.get('author'))
                                     }
                                     logger.info(f"📖 Book details found in {source}: {basic_info}")
-                                    
-                                    # Store the lookup results in the database
-                                    lookup_id = self.current_run.log_book_lookup(
-                                        bookspine_variant_id=variant_id,
-                                        source=source,
-                                        book_details=book_details,
-                                        raw_response=raw_response
-                                    )
+                                
+                                # Store the variant and its lookup results (if found) in one transaction
+                                variant_id, lookup_id = self.current_run.log_bookspine_variant_with_lookup(
+                                    bookspine_id, variant_path, best_title,
+                                    source=source,
+                                    book_details=book_details,
+                                    raw_response=raw_response
+                                )
+                                if lookup_id:
                                     logger.debug(f"Stored book lookup with ID {lookup_id} from source {source}")
                                 
                                 # Send data to the callback if registered
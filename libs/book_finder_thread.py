@@ -1,8 +1,14 @@
+import logging
+import logging.handlers
+import multiprocessing
+import signal
 import threading
 from flask import Flask
 from datetime import datetime
 
-from libs.book_finder import BookFinder
+import eventlet
+from eventlet.green import select as green_select
+
 from libs.logging import (
     get_logger, RunLogContext, 
     EventType, DetectionEvent, RunStatusEvent
@@ -11,9 +17,63 @@ from libs.logging import (
 # Module-specific logger
 logger = get_logger(__name__)
 
+# BookFinder runs in a child process, so its CPU-bound work (YOLO, OpenCV, OCR) cannot block the
+# eventlet hub of the server. "spawn" avoids forking a process with a running eventlet hub.
+_mp_context = multiprocessing.get_context("spawn")
+
+
+class _EventSender:
+    """
+    Sends events to the server over the write end of a pipe. A lock keeps the messages of
+    several threads (e.g. logging from OCR worker threads) from interleaving.
+    """
+    def __init__(self, conn):
+        self._conn = conn
+        self._lock = threading.Lock()
+
+    def put(self, item):
+        with self._lock:
+            self._conn.send(item)
+
+
+class _EventSenderHandler(logging.handlers.QueueHandler):
+    """QueueHandler for an _EventSender, which has no put_nowait()."""
+    def enqueue(self, record):
+        self.queue.put(record)
+
+
+def _find_books_in_process(run_context, source, output_dir, debug, events_conn):
+    """
+    Entry point of the child process. Log records and detections are sent back to the
+    server through the events pipe, where BookFinderThread forwards them to the clients.
+    """
+    events = _EventSender(events_conn)
+
+    # Ctrl-C is handled by the server process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Route all logging of this process to the server
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(_EventSenderHandler(events))
+
+    # Imported only here, so the server process never loads YOLO, Torch and OpenCV
+    from libs.book_finder import BookFinder
+
+    book_finder = BookFinder(run=run_context, output_dir=output_dir, debug=debug)
+    book_finder.on_detection = lambda bookspine_data: events.put(("detection", bookspine_data))
+    try:
+        book_finder.findBooks(source)
+        events.put(("completed", None))
+    except Exception as e:
+        events.put(("error", str(e)))
+
+
 class BookFinderThread(threading.Thread):
     """
     A thread that runs the BookFinder and handles logging through the new event system.
+    The detection itself runs in a child process; this thread only relays its logs and events.
     """
     
     def __init__(self, app: Flask, source: str = None, output_dir: str = None, run_context=None, debug: int = 0):
@@ -33,63 +93,123 @@ class BookFinderThread(threading.Thread):
         self.debug = debug
         self.socket_manager = app.socket_manager
 
-        # Initialize BookFinder with the RunContext and debug level
-        self.book_finder = BookFinder(
-            run=self.run_context,
-            output_dir=self.output_dir,
-            debug=self.debug
-        )
-        
-        # Callback for detections with the new event system
-        self.book_finder.on_detection = self._handle_detection
-
-    def _handle_detection(self, bookspine_data):
+    def _handle_detections(self, detections):
         """
-        Processes a new detection with the typed event system.
+        Processes new detections with the typed event system, sending them as one message.
         """
-        event = DetectionEvent(
-            id=bookspine_data.get('id'),
-            image_path=bookspine_data.get('image_path'),
-            title=bookspine_data.get('title'),
-            book_details=bookspine_data.get('book_details'),
-            source=bookspine_data.get('source')  # Include the source field
-        )
-        self.socket_manager.emit_event(
+        events = [
+            DetectionEvent(
+                id=bookspine_data.get('id'),
+                image_path=bookspine_data.get('image_path'),
+                title=bookspine_data.get('title'),
+                book_details=bookspine_data.get('book_details'),
+                source=bookspine_data.get('source')  # Include the source field
+            )
+            for bookspine_data in detections
+        ]
+        self.socket_manager.emit_batch(
             event_type=EventType.DETECTION,
-            event_data=event,
+            events=events,
             namespace=f'/run_{self.run_context.run_id}'
         )
 
+    def _handle_log_record(self, record):
+        """Passes a log record from the child process to the handlers of this run."""
+        record.run_id = self.run_context.run_id
+        logging.getLogger(record.name).handle(record)
+
+    def _find_books(self):
+        """
+        Runs BookFinder in a child process and relays its events until it has finished.
+        Returns the final status and, on error, its message.
+        """
+        # The child writes straight to the pipe; there is no feeder thread as in multiprocessing.Queue
+        events, events_writer = _mp_context.Pipe(duplex=False)
+        process = _mp_context.Process(
+            target=_find_books_in_process,
+            args=(self.run_context, self.source, self.output_dir, self.debug, events_writer),
+            daemon=True
+        )
+        process.start()
+        # Only the child writes; with the server's write end closed, the pipe reports EOF once the child exits
+        events_writer.close()
+        try:
+            return self._relay_events(process, events)
+        finally:
+            events.close()
+            # Reaps the child once it has exited, without holding a native thread
+            eventlet.spawn_n(self._reap, process)
+
+    @staticmethod
+    def _reap(process):
+        """Waits (cooperatively) for the child process to exit and collects its exit status."""
+        green_select.select([process.sentinel], [], [])
+        process.join()
+
+    def _relay_events(self, process, events):
+        """
+        Relays the events (read end of the pipe) of the child process until it reports a final
+        status or exits.
+        Returns the final status and, on error, its message.
+        """
+        # Detections that arrive in a burst are collected and sent once the pipe is drained
+        detections = []
+        while True:
+            if not events.poll():
+                if detections:
+                    self._handle_detections(detections)
+                    detections = []
+
+                # Waits on the hub (no native thread) for the next event or the exit of the child
+                green_select.select([events, process.sentinel], [], [])
+
+            # Only read once a message is available, so recv() doesn't block the hub
+            try:
+                item = events.recv() if events.poll() else None
+            except EOFError:
+                item = None
+            if item is None:
+                # The child has exited without reporting a status
+                process.join()
+                return "error", f"Book detection process exited with code {process.exitcode}"
+
+            if isinstance(item, logging.LogRecord):
+                self._handle_log_record(item)
+                continue
+
+            kind, payload = item
+            if kind == "detection":
+                detections.append(payload)
+                continue
+
+            if detections:
+                self._handle_detections(detections)
+            if kind == "completed":
+                return "completed", None
+            elif kind == "error":
+                return "error", payload
+
     def run(self):
         """
-        Runs the BookFinder in a separate thread.
+        Runs the BookFinder in a separate process.
         """
         # Use the RunLogContext for all logging calls in this thread
         with RunLogContext(self.run_context.run_id):
-            try:
-                # Send start status
-                self.socket_manager.emit_event(
-                    event_type=EventType.RUN_STATUS,
-                    event_data=RunStatusEvent(status="starting"),
-                    namespace=f'/run_{self.run_context.run_id}'
-                )
-                
-                self.book_finder.findBooks(self.source)
-                
-                # Send success status
-                self.socket_manager.emit_event(
-                    event_type=EventType.RUN_STATUS,
-                    event_data=RunStatusEvent(status="completed"),
-                    namespace=f'/run_{self.run_context.run_id}'
-                )
-                
-            except Exception as e:
-                # Send error status
-                self.socket_manager.emit_event(
-                    event_type=EventType.RUN_STATUS,
-                    event_data=RunStatusEvent(status="error", message=str(e)),
-                    namespace=f'/run_{self.run_context.run_id}'
-                )
-                
-                logger.error(f"❌ Error during book detection: {str(e)}")
-                raise
\ No newline at end of file
+            # Send start status
+            self.socket_manager.emit_event(
+                event_type=EventType.RUN_STATUS,
+                event_data=RunStatusEvent(status="starting"),
+                namespace=f'/run_{self.run_context.run_id}'
+            )
+            
+            status, message = self._find_books()
+            
+            # Send final status
+            self.socket_manager.emit_event(
+                event_type=EventType.RUN_STATUS,
+                event_data=RunStatusEvent(status=status, message=message),
+                namespace=f'/run_{self.run_context.run_id}'
+            )
+            
+            if status == "error":
+                logger.error(f"❌ Error during book detection: {message}")
@@ -1,5 +1,51 @@
+import os
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from functools import wraps
+
+# SQLite supports a single writer at a time. All writes of this process are serialized with this
+# lock (a green lock once eventlet has monkey-patched threading), so concurrent runs queue up here
+# instead of failing with "database is locked".
+_write_lock = threading.Lock()
+
+# The write connection per database file, opened once per process and only used under _write_lock
+_write_conns = {}
+
+def _connect(db_path):
+    """
+    Returns the write connection for the database, opening it on first use.
+    It waits up to 5s for a lock held by another process.
+    """
+    conn = _write_conns.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=5, check_same_thread=False)
+        # Safe in WAL mode; only the last commits may be lost on power failure, not the database
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA wal_autocheckpoint=1000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        _write_conns[db_path] = conn
+    return conn
+
+# Number of read-only connections kept open by DatabaseManager for the web handlers
+READ_POOL_SIZE = min(8, os.cpu_count() or 1)
+
+def _serialized_write(method):
+    """
+    Runs the decorated method while holding the process-wide write lock. If it fails,
+    its uncommitted changes are rolled back, so they don't end up in the next commit.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with _write_lock:
+            try:
+                return method(self, *args, **kwargs)
+            except Exception:
+                self._connect().rollback()
+                raise
+    return wrapper
 
 class RunContext:
     def __init__(self, db_path, run_id):
@@ -7,8 +53,9 @@ class RunContext:
         self.run_id = run_id
 
     def _connect(self):
-        return sqlite3.connect(self.db_path)
+        return _connect(self.db_path)
 
+    @_serialized_write
     def update_statistics(self, end_time, books_detected):
         conn = self._connect()
         cursor = conn.cursor()
@@ -21,8 +68,8 @@ class RunContext:
             (end_time, books_detected, self.run_id),
         )
         conn.commit()
-        conn.close()
 
+    @_serialized_write
     def update_paths(self, input_file=None, output_dir=None):
         conn = self._connect()
         cursor = conn.cursor()
@@ -35,8 +82,8 @@ class RunContext:
             (input_file, output_dir, self.run_id),
         )
         conn.commit()
-        conn.close()
 
+    @_serialized_write
     def log_bookspine(self):
         conn = self._connect()
         cursor = conn.cursor()
@@ -49,9 +96,9 @@ class RunContext:
         )
         bookspine_id = cursor.lastrowid
         conn.commit()
-        conn.close()
         return bookspine_id
 
+    @_serialized_write
     def log_bookspine_variant(self, bookspine_id, image_path, best_title):
         conn = self._connect()
         cursor = conn.cursor()
@@ -64,9 +111,42 @@ class RunContext:
         )
         variant_id = cursor.lastrowid
         conn.commit()
-        conn.close()
         return variant_id
         
+    @_serialized_write
+    def log_bookspine_variant_with_lookup(self, bookspine_id, image_path, best_title,
+                                          source=None, book_details=None, raw_response=None):
+        """
+        Log a bookspine variant together with its book lookup results in a single transaction.
+        
+        Args:
+            bookspine_id: ID of the bookspine the variant belongs to
+            image_path: Path of the variant image
+            best_title: Title selected for the variant
+            source: Source of the lookup (e.g., 'DNB', 'OpenLibrary', 'lobid_GND')
+            book_details: Dictionary containing book details, None if nothing was found
+            raw_response: Optional raw response data as string (e.g., JSON)
+        
+        Returns:
+            Tuple of the variant ID and the book lookup ID (None if no book details were given)
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO bookspine_variants (bookspine_id, image_path, best_title)
+            VALUES (?, ?, ?)
+            """,
+            (bookspine_id, image_path, best_title),
+        )
+        variant_id = cursor.lastrowid
+        lookup_id = None
+        if book_details:
+            lookup_id = self._insert_book_lookup(cursor, variant_id, source, book_details, raw_response)
+        conn.commit()
+        return variant_id, lookup_id
+
+    @_serialized_write
     def log_book_lookup(self, bookspine_variant_id, source, book_details, raw_response=None):
         """
         Log the results of a book lookup to the database.
@@ -85,7 +165,13 @@ class RunContext:
             
         conn = self._connect()
         cursor = conn.cursor()
-        
+        lookup_id = self._insert_book_lookup(cursor, bookspine_variant_id, source, book_details, raw_response)
+        conn.commit()
+        return lookup_id
+
+    @staticmethod
+    def _insert_book_lookup(cursor, bookspine_variant_id, source, book_details, raw_response):
+        """Inserts a book lookup record using the given cursor and returns its ID."""
         # Extract fields from book_details based on the source
         # Use None (NULL in SQLite) for missing values instead of 'Unbekannt'
         title = book_details.get('title')
@@ -115,24 +201,45 @@ class RunContext:
             ),
         )
         
-        lookup_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return lookup_id
+        return cursor.lastrowid
 
 class DatabaseManager:
     def __init__(self, db_path):
         self.db_path = db_path
         self._initialize_tables()  # Initialise tables right during startup.
 
+        # Readers are opened once and shared, instead of opening the database file on every request
+        self._read_pool = queue.Queue()
+        for _ in range(READ_POOL_SIZE):
+            self._read_pool.put(self._connect_reader())
+
     def _connect(self):
-        return sqlite3.connect(self.db_path)
+        return _connect(self.db_path)
+
+    def _connect_reader(self):
+        conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+        conn.execute("PRAGMA query_only=1")
+        conn.execute("PRAGMA cache_size=-20000")  # 20 MB page cache per connection
+        return conn
 
+    @contextmanager
+    def read_conn(self):
+        """Borrows a read-only connection from the pool, waiting up to 5s for one to be free."""
+        conn = self._read_pool.get(timeout=5)
+        try:
+            yield conn
+        finally:
+            self._read_pool.put(conn)
+
+    @_serialized_write
     def _initialize_tables(self):
         """Initialize all necessary tables in the database."""
         conn = self._connect()
         cursor = conn.cursor()
 
+        # WAL lets the web handlers read while a run is writing; the mode is stored in the database file
+        cursor.execute("PRAGMA journal_mode=WAL")
+
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS runs (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -185,23 +292,24 @@ class DatabaseManager:
         """)
 
         conn.commit()
-        conn.close()
 
-    def create_run(self, start_time, input_file=None, output_dir=None):
+    @_serialized_write
+    def create_run(self, start_time=None, input_file=None, output_dir=None):
         conn = self._connect()
         cursor = conn.cursor()
+        # Without a start time, SQLite sets the current local time (ISO format, like datetime.isoformat())
         cursor.execute(
             """
             INSERT INTO runs (start_time, input_file, output_dir)
-            VALUES (?, ?, ?)
+            VALUES (COALESCE(?, strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')), ?, ?)
             """,
             (start_time, input_file, output_dir),
         )
         run_id = cursor.lastrowid
         conn.commit()
-        conn.close()
         return RunContext(self.db_path, run_id)
 
+    @_serialized_write
     def log_run_start(self, start_time, input_file=None, output_dir=None):
         """
         Log the start of a run into the database and return the run ID.
@@ -219,137 +327,133 @@ class DatabaseManager:
         """, (start_time, input_file, output_dir))
         run_id = cursor.lastrowid
         conn.commit()
-        conn.close()
         return run_id
 
     def get_bookspines(self, run_id=None):
         """Retrieve bookspines from the database, optionally filtered by run_id."""
-        conn = self._connect()
-        cursor = conn.cursor()
+        with self.read_conn() as conn:
+            cursor = conn.cursor()
 
-        if run_id:
-            cursor.execute("SELECT * FROM bookspines WHERE run_id = ?", (run_id,))
-        else:
-            cursor.execute("SELECT * FROM bookspines")
+            if run_id:
+                cursor.execute("SELECT * FROM bookspines WHERE run_id = ?", (run_id,))
+            else:
+                cursor.execute("SELECT * FROM bookspines")
 
-        rows = cursor.fetchall()
-        conn.close()
+            rows = cursor.fetchall()
 
         return [dict(id=row[0], run_id=row[1], data=row[2]) for row in rows]
         
     def get_bookspines_for_run(self, run_id):
         """Retrieve all bookspines with their variants and book lookups for a specific run."""
-        conn = self._connect()
-        cursor = conn.cursor()
+        with self.read_conn() as conn:
+            cursor = conn.cursor()
         
-        # Get all bookspines for this run
-        cursor.execute("""
-            SELECT id, run_id, created, updated
-            FROM bookspines
-            WHERE run_id = ?
-        """, (run_id,))
+            # Get all bookspines for this run
+            cursor.execute("""
+                SELECT id, run_id, created, updated
+                FROM bookspines
+                WHERE run_id = ?
+            """, (run_id,))
         
-        bookspines = []
-        for bookspine_row in cursor.fetchall():
-            bookspine_id = bookspine_row[0]
+            bookspines = []
+            for bookspine_row in cursor.fetchall():
+                bookspine_id = bookspine_row[0]
             
-            # Get all variants for this bookspine
-            cursor.execute("""
-                SELECT id, image_path, best_title, created, updated
-                FROM bookspine_variants
-                WHERE bookspine_id = ?
-            """, (bookspine_id,))
+                # Get all variants for this bookspine
+                cursor.execute("""
+                    SELECT id, image_path, best_title, created, updated
+                    FROM bookspine_variants
+                    WHERE bookspine_id = ?
+                """, (bookspine_id,))
             
-            variants = []
-            for variant_row in cursor.fetchall():
-                variant_id = variant_row[0]
+                variants = []
+                for variant_row in cursor.fetchall():
+                    variant_id = variant_row[0]
                 
-                # Get all book lookups for this variant
-                cursor.execute("""
-                    SELECT id, source, title, authors, year, isbn, 
-                           gnd_identifier, wikidata_link, lobid_id, created
-                    FROM book_lookups
-                    WHERE bookspine_variant_id = ?
-                """, (variant_id,))
+                    # Get all book lookups for this variant
+                    cursor.execute("""
+                        SELECT id, source, title, authors, year, isbn, 
+                               gnd_identifier, wikidata_link, lobid_id, created
+                        FROM book_lookups
+                        WHERE bookspine_variant_id = ?
+                    """, (variant_id,))
                 
-                lookups = []
-                for lookup_row in cursor.fetchall():
-                    lookups.append({
-                        'id': lookup_row[0],
-                        'source': lookup_row[1],
-                        'title': lookup_row[2],
-                        'authors': lookup_row[3],
-                        'year': lookup_row[4],
-                        'isbn': lookup_row[5],
-                        'gnd_identifier': lookup_row[6],
-                        'wikidata_link': lookup_row[7],
-                        'lobid_id': lookup_row[8],
-                        'created': lookup_row[9]
-                    })
+                    lookups = []
+                    for lookup_row in cursor.fetchall():
+                        lookups.append({
+                            'id': lookup_row[0],
+                            'source': lookup_row[1],
+                            'title': lookup_row[2],
+                            'authors': lookup_row[3],
+                            'year': lookup_row[4],
+                            'isbn': lookup_row[5],
+                            'gnd_identifier': lookup_row[6],
+                            'wikidata_link': lookup_row[7],
+                            'lobid_id': lookup_row[8],
+                            'created': lookup_row[9]
+                        })
                 
-                variants.append({
-                    'id': variant_id,
-                    'image_path': variant_row[1],
-                    'title': variant_row[2],
-                    'created': variant_row[3],
-                    'updated': variant_row[4],
-                    'lookups': lookups
-                })
+                    variants.append({
+                        'id': variant_id,
+                        'image_path': variant_row[1],
+                        'title': variant_row[2],
+                        'created': variant_row[3],
+                        'updated': variant_row[4],
+                        'lookups': lookups
+                    })
             
-            # Add bookspine with its variants to the result
-            bookspines.append({
-                'id': bookspine_id,
-                'run_id': bookspine_row[1],
-                'created': bookspine_row[2],
-                'updated': bookspine_row[3],
-                'variants': variants
-            })
+                # Add bookspine with its variants to the result
+                bookspines.append({
+                    'id': bookspine_id,
+                    'run_id': bookspine_row[1],
+                    'created': bookspine_row[2],
+                    'updated': bookspine_row[3],
+                    'variants': variants
+                })
         
-        conn.close()
         return bookspines
         
     def get_book_lookups_for_variant(self, variant_id):
         """Retrieve all book lookups for a specific bookspine variant."""
-        conn = self._connect()
-        cursor = conn.cursor()
+        with self.read_conn() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT id, source, title, authors, year, isbn, 
-                   gnd_identifier, wikidata_link, lobid_id, raw_response, created
-            FROM book_lookups
-            WHERE bookspine_variant_id = ?
-        """, (variant_id,))
+            cursor.execute("""
+                SELECT id, source, title, authors, year, isbn, 
+                       gnd_identifier, wikidata_link, lobid_id, raw_response, created
+                FROM book_lookups
+                WHERE bookspine_variant_id = ?
+            """, (variant_id,))
         
-        lookups = []
-        for row in cursor.fetchall():
-            lookups.append({
-                'id': row[0],
-                'source': row[1],
-                'title': row[2],
-                'authors': row[3],
-                'year': row[4],
-                'isbn': row[5],
-                'gnd_identifier': row[6],
-                'wikidata_link': row[7],
-                'lobid_id': row[8],
-                'raw_response': row[9],
-                'created': row[10]
-            })
+            lookups = []
+            for row in cursor.fetchall():
+                lookups.append({
+                    'id': row[0],
+                    'source': row[1],
+                    'title': row[2],
+                    'authors': row[3],
+                    'year': row[4],
+                    'isbn': row[5],
+                    'gnd_identifier': row[6],
+                    'wikidata_link': row[7],
+                    'lobid_id': row[8],
+                    'raw_response': row[9],
+                    'created': row[10]
+                })
         
-        conn.close()
         return lookups
 
     def get_all_runs(self):
-        """Retrieve all runs from the database with their details."""
-        conn = self._connect()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, start_time, end_time, books_detected, output_dir, input_file
-            FROM runs
-            ORDER BY start_time DESC
-        """)
-        runs = cursor.fetchall()
-        conn.close()
+        """Retrieve all runs from the database with their details and status."""
+        with self.read_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, start_time, end_time, books_detected, output_dir, input_file,
+                       CASE WHEN end_time IS NULL THEN 'running' ELSE 'completed' END AS status
+                FROM runs
+                ORDER BY start_time DESC
+            """)
+            runs = cursor.fetchall()
         
         return [{
             'run_id': row[0],
@@ -357,21 +461,21 @@ class DatabaseManager:
             'end_time': row[2],
             'books_detected': row[3],
             'output_dir': row[4],
-            'input_file': row[5]
+            'input_file': row[5],
+            'status': row[6]
         } for row in runs]
         
     def get_run_details(self, run_id):
         """Retrieve details for a specific run."""
-        conn = self._connect()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, start_time, end_time, books_detected, output_dir, input_file
-            FROM runs
-            WHERE id = ?
-        """, (run_id,))
+        with self.read_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, start_time, end_time, books_detected, output_dir, input_file
+                FROM runs
+                WHERE id = ?
+            """, (run_id,))
         
-        row = cursor.fetchone()
-        conn.close()
+            row = cursor.fetchone()
         
         if not row:
             return None
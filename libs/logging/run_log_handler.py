@@ -2,10 +2,17 @@
 
 import os
 import logging
+import threading
 from datetime import datetime
+
+import eventlet
+
 from .socket_events import EventType, LogEvent
 from .log_context import LogFilter
 
+# Seconds live log messages are collected before they are sent to the clients as one batch
+LOG_FLUSH_INTERVAL = 0.2
+
 class RunLogHandler(logging.Handler):
     """Handles logging for a specific run."""
     
@@ -15,6 +22,9 @@ class RunLogHandler(logging.Handler):
         self.socket_manager = socket_manager
         self.namespace = f'/run_{run_id}'
         self.log_buffer = []  # Buffer für Logs
+        # Serializes buffering and flushing, e.g. when several clients connect at once
+        self._buffer_lock = threading.Lock()
+        self._flush_timer = None  # Pending scheduled flush, if any
         
         self.run_id = run_id
         self.output_dir = output_dir
@@ -43,11 +53,12 @@ class RunLogHandler(logging.Handler):
         logging.getLogger().addHandler(self)
     
     def flush_buffer(self):
-        """Flush buffered logs to the socket."""
-        if self.log_buffer:
-            for event in self.log_buffer:
-                self.socket_manager.emit_event(EventType.LOG, event, self.namespace)
-            self.log_buffer.clear()
+        """Flush buffered logs to the socket, as a single batch message."""
+        with self._buffer_lock:
+            events = self.log_buffer
+            self.log_buffer = []
+        if events:
+            self.socket_manager.emit_batch(EventType.LOG, events, self.namespace)
         
     def emit(self, record):
         """Emit a log record both to file and socket."""
@@ -60,11 +71,18 @@ class RunLogHandler(logging.Handler):
             timestamp=datetime.now().isoformat()
         )
         
-        # Either emit directly or buffer
-        if self.socket_manager._socketio.server.eio.sockets:
-            self.socket_manager.emit_event(EventType.LOG, event, self.namespace)
-        else:
+        # Buffer the event. With clients connected, the buffer is sent shortly after, together with
+        # any further messages logged until then; otherwise it is sent when a client connects.
+        with self._buffer_lock:
             self.log_buffer.append(event)
+            if self._flush_timer is None and self.socket_manager._socketio.server.eio.sockets:
+                self._flush_timer = eventlet.spawn_after(LOG_FLUSH_INTERVAL, self._scheduled_flush)
+
+    def _scheduled_flush(self):
+        """Flush the buffer, allowing the next log message to schedule another flush."""
+        with self._buffer_lock:
+            self._flush_timer = None
+        self.flush_buffer()
         
     def cleanup(self):
         """Clean up the handlers when namespace is deregistered."""
@@ -74,4 +92,11 @@ class RunLogHandler(logging.Handler):
             logging.getLogger().removeHandler(self.file_handler)
             
         # Remove self as handler
-        logging.getLogger().removeHandler(self)
\ No newline at end of file
+        logging.getLogger().removeHandler(self)
+        
+        # Send the last log lines now instead of after the run has been cleaned up
+        with self._buffer_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        self.flush_buffer()
\ No newline at end of file
@@ -3,7 +3,7 @@
 import eventlet
 from dataclasses import asdict
 from flask_socketio import SocketIO
-from typing import Union, Any
+from typing import Union, Any, List
 
 from .socket_events import EventType, LogEvent, DetectionEvent, RunStatusEvent
 
@@ -36,6 +36,26 @@ class SocketManager:
         data = asdict(event_data)
         self._socketio.emit(event_type.value, data, namespace=namespace)
         
+        # Threads are green threads (eventlet monkey-patching), and the book finder only yields
+        # on I/O. Yield here, so the eventlet hub sends the event now instead of in bursts.
+        self._socketio.sleep(0)
+        
+    def emit_batch(self, event_type: EventType, events: List[Union[LogEvent, DetectionEvent, RunStatusEvent]], namespace='/'):
+        """
+        Emit several events of the same type as a single message: {'batch': [event, ...]}.
+        
+        Args:
+            event_type: The type of the events
+            events: The event data, each must match the event type
+            namespace: The namespace to emit to
+        """
+        for event_data in events:
+            if not self._validate_event(event_type, event_data):
+                raise ValueError(f"Event data {type(event_data)} does not match event type {event_type}")
+        
+        self._socketio.emit(event_type.value, {'batch': [asdict(event_data) for event_data in events]}, namespace=namespace)
+        self._socketio.sleep(0)
+        
     def _validate_event(self, event_type: EventType, event_data: Any) -> bool:
         """Validate that the event data matches the event type."""
         return (
@@ -2,13 +2,14 @@
 Utility module containing various helper functions and tools.
 """
 
-from .general_utils import initialize as initialize_general
-from .image_utils import initialize as initialize_image
-from .text_utils import initialize as initialize_text
-from .ocr_utils import initialize as initialize_ocr
-from .lookup_utils import initialize as initialize_lookup
-
 def initialize():
+    # Imported here rather than at package level, so importing one util doesn't load all of them
+    from .general_utils import initialize as initialize_general
+    from .image_utils import initialize as initialize_image
+    from .text_utils import initialize as initialize_text
+    from .ocr_utils import initialize as initialize_ocr
+    from .lookup_utils import initialize as initialize_lookup
+
     initialize_general()
     initialize_image()
     initialize_text()
@@ -164,10 +164,8 @@ def unsharp_mask(image, kernel_size=(5, 5), sigma=1.0, amount=1.5, threshold=0):
         numpy.ndarray: The sharpened image.
     """
     blurred = cv2.GaussianBlur(image, kernel_size, sigma)
-    sharpened = float(amount + 1) * image - float(amount) * blurred
-    sharpened = np.maximum(sharpened, np.zeros(sharpened.shape))
-    sharpened = np.minimum(sharpened, 255 * np.ones(sharpened.shape))
-    sharpened = sharpened.round().astype(np.uint8)
+    # (amount + 1) * image - amount * blurred, rounded and clipped to 0..255 in a single pass
+    sharpened = cv2.addWeighted(image, float(amount + 1), blurred, -float(amount), 0)
     if threshold > 0:
         low_contrast_mask = np.absolute(image - blurred) < threshold
         np.copyto(sharpened, image, where=low_contrast_mask)
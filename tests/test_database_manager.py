@@ -0,0 +1,113 @@
+"""
+Tests for the DatabaseManager and RunContext persistence layer.
+
+Covers the shared write connection (rollback of failed writes, atomic variant + lookup
+inserts) and the pool of read-only connections.
+"""
+
+import unittest
+from unittest.mock import patch
+import sqlite3
+import tempfile
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from libs import database_manager
+from libs.database_manager import DatabaseManager, RunContext, READ_POOL_SIZE
+
+
+class TestDatabaseManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "test.db")
+        self.db = DatabaseManager(self.db_path)
+        self.run = self.db.create_run(input_file="input.jpg", output_dir="output")
+        self.bookspine_id = self.run.log_bookspine()
+
+    def tearDown(self):
+        while not self.db._read_pool.empty():
+            self.db._read_pool.get_nowait().close()
+        database_manager._write_conns.pop(self.db_path).close()
+        self.tmp_dir.cleanup()
+
+    def count_rows(self, table):
+        with self.db.read_conn() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_failed_write_is_rolled_back_and_later_writes_work(self):
+        # The variant is inserted, then the lookup insert fails
+        with patch.object(RunContext, '_insert_book_lookup', side_effect=sqlite3.IntegrityError("boom")):
+            with self.assertRaises(sqlite3.IntegrityError):
+                self.run.log_bookspine_variant_with_lookup(
+                    self.bookspine_id, "spine.jpg", "Titel", source="DNB", book_details={"title": "Titel"})
+
+        # The next write commits on the same connection; it must not commit the half-done variant
+        second_bookspine_id = self.run.log_bookspine()
+        self.assertIsNotNone(second_bookspine_id)
+        self.assertEqual(self.count_rows("bookspine_variants"), 0)
+        self.assertEqual(self.count_rows("bookspines"), 2)
+
+        variant_id = self.run.log_bookspine_variant(second_bookspine_id, "spine.jpg", "Titel")
+        self.assertIsNotNone(variant_id)
+        self.assertEqual(self.count_rows("bookspine_variants"), 1)
+
+    def test_variant_with_lookup_is_written_together(self):
+        variant_id, lookup_id = self.run.log_bookspine_variant_with_lookup(
+            self.bookspine_id, "spine.jpg", "Der Titel", source="DNB",
+            book_details={"title": "Der Titel", "authors": "Autor A", "year": "2020"},
+            raw_response={"status": "ok"})
+
+        lookups = self.db.get_book_lookups_for_variant(variant_id)
+        self.assertEqual(len(lookups), 1)
+        self.assertEqual(lookups[0]["id"], lookup_id)
+        self.assertEqual(lookups[0]["title"], "Der Titel")
+        self.assertEqual(lookups[0]["raw_response"], '{"status": "ok"}')
+
+    def test_variant_without_book_details_has_no_lookup(self):
+        variant_id, lookup_id = self.run.log_bookspine_variant_with_lookup(
+            self.bookspine_id, "spine.jpg", "Der Titel", source="DNB", book_details=None)
+
+        self.assertIsNotNone(variant_id)
+        self.assertIsNone(lookup_id)
+        self.assertEqual(self.count_rows("book_lookups"), 0)
+
+    def test_failed_lookup_insert_leaves_no_variant(self):
+        with patch.object(RunContext, '_insert_book_lookup', side_effect=sqlite3.OperationalError("boom")):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.run.log_bookspine_variant_with_lookup(
+                    self.bookspine_id, "spine.jpg", "Titel", source="DNB", book_details={"title": "Titel"})
+
+        self.assertEqual(self.count_rows("bookspine_variants"), 0)
+        self.assertEqual(self.count_rows("book_lookups"), 0)
+
+    def test_read_connections_reject_writes(self):
+        with self.db.read_conn() as conn:
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("INSERT INTO bookspines (run_id) VALUES (?)", (self.run.run_id,))
+
+        self.assertEqual(self.count_rows("bookspines"), 1)
+
+    def test_read_connection_is_returned_after_exception(self):
+        with self.assertRaises(ValueError):
+            with self.db.read_conn():
+                raise ValueError("boom")
+
+        self.assertEqual(self.db._read_pool.qsize(), READ_POOL_SIZE)
+
+        # All connections can still be borrowed at the same time
+        borrowed = [self.db._read_pool.get_nowait() for _ in range(READ_POOL_SIZE)]
+        for conn in borrowed:
+            self.db._read_pool.put(conn)
+
+    def test_reads_see_committed_writes(self):
+        self.run.update_statistics("2024-01-01T12:00:00", 3)
+
+        details = self.db.get_run_details(self.run.run_id)
+        self.assertEqual(details["books_detected"], 3)
+        self.assertEqual(details["input_file"], "input.jpg")
+        self.assertIsNotNone(details["start_time"])
+
+
+if __name__ == '__main__':
+    unittest.main()
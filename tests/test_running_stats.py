@@ -0,0 +1,77 @@
+"""
+Tests for the streaming RunningStats used to aggregate COCO statistics across files.
+
+Compares its summary with NumPy's exact statistics on random data, including after merging
+several RunningStats and for odd and even value counts.
+"""
+
+import unittest
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from analysis.analyze_coco_textblocks import RunningStats, HISTOGRAM_BINS
+
+
+class TestRunningStats(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(42)
+
+    def assertMatchesNumpy(self, stats, values):
+        mean, median, min_val, max_val, std = stats.summary()
+        self.assertEqual(len(stats), values.size)
+        self.assertAlmostEqual(mean, float(values.mean(dtype=np.float64)), places=9)
+        self.assertAlmostEqual(std, float(values.std(dtype=np.float64)), places=9)
+        self.assertEqual(min_val, float(values.min()))
+        self.assertEqual(max_val, float(values.max()))
+        # The median is only accurate to the histogram resolution
+        self.assertLessEqual(abs(median - float(np.median(values))), 1.0 / HISTOGRAM_BINS)
+
+    def test_odd_count(self):
+        values = self.rng.random(10001, dtype=np.float32)
+        stats = RunningStats()
+        stats.add(values)
+        self.assertMatchesNumpy(stats, values)
+
+    def test_even_count(self):
+        values = self.rng.random(10000, dtype=np.float32)
+        stats = RunningStats()
+        stats.add(values)
+        self.assertMatchesNumpy(stats, values)
+
+    def test_two_values_in_different_bins(self):
+        """With an even count, the median lies between the two middle values, as np.median."""
+        values = np.array([0.2, 0.6], dtype=np.float32)
+        stats = RunningStats()
+        stats.add(values)
+        self.assertMatchesNumpy(stats, values)
+
+    def test_merge(self):
+        parts = [self.rng.random(n, dtype=np.float32) for n in (1000, 2501, 0, 777)]
+        merged = RunningStats()
+        for part in parts:
+            stats = RunningStats()
+            stats.add(part)
+            merged.merge(stats)
+        self.assertMatchesNumpy(merged, np.concatenate(parts))
+
+    def test_std_small_spread(self):
+        """A large mean with a small spread doesn't lose the std to cancellation."""
+        values = self.rng.normal(0.8, 0.001, 200000).astype(np.float32)
+        stats = RunningStats()
+        for chunk in np.array_split(values, 7):
+            stats.add(chunk)
+        std = stats.summary()[4]
+        self.assertAlmostEqual(std, float(values.std(dtype=np.float64)), delta=1e-7)
+
+    def test_values_outside_range(self):
+        """Values outside 0..1 are counted in the outermost bins; min and max stay exact."""
+        values = np.array([-0.1, 0.5, 0.5, 1.2], dtype=np.float32)
+        stats = RunningStats()
+        stats.add(values)
+        self.assertMatchesNumpy(stats, values)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Tests for serving run images via /image/<run_id>.
+
+Covers the confinement of image paths to HOME_DIR ('..', absolute paths, symlinks), ETag
+revalidation with If-None-Match and the X-Accel-Redirect path built for Nginx.
+"""
+
+import unittest
+from unittest.mock import patch
+import tempfile
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import config
+import app as app_module
+from libs import database_manager
+from libs.database_manager import DatabaseManager
+
+
+class TestServeImage(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        # HOME_DIR is a subdirectory, so files next to it are outside the served tree
+        self.home_dir = os.path.join(self.tmp_dir.name, "home")
+        os.makedirs(os.path.join(self.home_dir, "output"))
+        self.image_path = os.path.join(self.home_dir, "output", "spine 1.jpg")
+        with open(self.image_path, "wb") as f:
+            f.write(b"\xff\xd8\xff\xe0 image")
+        self.outside_path = os.path.join(self.tmp_dir.name, "outside.jpg")
+        with open(self.outside_path, "wb") as f:
+            f.write(b"\xff\xd8\xff\xe0 secret")
+
+        self.db_path = os.path.join(self.tmp_dir.name, "test.db")
+        with patch.object(config, "HOME_DIR", self.home_dir), \
+             patch.object(app_module, "DatabaseManager", lambda path: DatabaseManager(self.db_path)):
+            self.app = app_module.create_app()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db = self.app.db_manager
+        while not db._read_pool.empty():
+            db._read_pool.get_nowait().close()
+        database_manager._write_conns.pop(self.db_path).close()
+        self.tmp_dir.cleanup()
+
+    def get_image(self, path, headers=None):
+        return self.client.get("/image/1", query_string={"path": path}, headers=headers)
+
+    def test_serves_image_within_home_dir(self):
+        response = self.get_image("output/spine 1.jpg")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "image/jpeg")
+        self.assertEqual(response.get_data(), b"\xff\xd8\xff\xe0 image")
+
+    def test_rejects_dotdot_traversal(self):
+        response = self.get_image("output/../../outside.jpg")
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_absolute_path_outside_home_dir(self):
+        response = self.get_image(self.outside_path)
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_home_dir_prefix_sibling(self):
+        # A sibling directory whose name starts with the home directory's name
+        sibling_dir = self.home_dir + "-other"
+        os.makedirs(sibling_dir)
+        with open(os.path.join(sibling_dir, "a.jpg"), "wb") as f:
+            f.write(b"x")
+        response = self.get_image(os.path.join(sibling_dir, "a.jpg"))
+        self.assertEqual(response.status_code, 400)
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "symlinks not supported")
+    def test_rejects_symlink_escaping_home_dir(self):
+        os.symlink(self.outside_path, os.path.join(self.home_dir, "output", "link.jpg"))
+        response = self.get_image("output/link.jpg")
+        self.assertEqual(response.status_code, 400)
+
+    def test_missing_file(self):
+        response = self.get_image("output/missing.jpg")
+        self.assertEqual(response.status_code, 404)
+
+    def test_if_none_match_returns_304(self):
+        response = self.get_image("output/spine 1.jpg")
+        etag = response.headers["ETag"]
+        self.assertTrue(etag)
+
+        response = self.get_image("output/spine 1.jpg", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b"")
+
+    def test_x_accel_redirect(self):
+        with patch.object(config, "X_ACCEL_REDIRECT_PREFIX", "/_protected/"):
+            response = self.get_image("output/spine 1.jpg")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["X-Accel-Redirect"], "/_protected/output/spine%201.jpg")
+        self.assertEqual(response.headers["Content-Type"], "image/jpeg")
+        self.assertEqual(response.get_data(), b"")
+
+
+if __name__ == '__main__':
+    unittest.main()